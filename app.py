@@ -1,12 +1,17 @@
+import time
+
+# Cold-start clock; started before anything below is imported
+SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
 import json
 from datetime import datetime, timedelta
 import random
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import uuid
+import os
+import threading
+import weakref
+import functools
 
 # Page configuration
 st.set_page_config(
@@ -54,7 +59,8 @@ st.markdown("""
         font-weight: bold;
     }
     
-    .stTabs [data-baseweb="tab-list"] button [data-testid="stMarkdownContainer"] p {
+    .stTabs [data-baseweb="tab-list"] button [data-testid="stMarkdownContainer"] p,
+    .stRadio [role="radiogroup"] label [data-testid="stMarkdownContainer"] p {
         font-size: 1.1rem;
         font-weight: 600;
     }
@@ -63,159 +69,589 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Header and sidebar logo go out before the heavy imports and the data load
+# below, so the page shell shows immediately on a cold start
+st.markdown("""
+<div class="main-header">
+    <h1>🐉 Dragon Payout Dashboard</h1>
+    <p>Powerful user management and analytics platform</p>
+</div>
+""", unsafe_allow_html=True)
+with st.sidebar:
+    st.markdown('<div class="sidebar-logo">🐉 Dragon Payout</div>', unsafe_allow_html=True)
+
+# Dataset size and seed come from the sidebar Demo Mode controls
+demo_key = (st.session_state.get("demo_user_count", 50), st.session_state.get("demo_seed", 42))
+loading = st.empty()
+if st.session_state.get("demo_key") != demo_key:
+    loading.info(f"⏳ Loading {demo_key[0]:,} demo users...")
+
+import numpy as np
+import pandas as pd
+
+import demo_data
+from user_store import STATUSES, PAYOUT_METHODS, COUNTRY_CODES
+from user_index import TrigramIndex, FilterIndex, HashIndex, LRUCache, casefold_key, phone_key
+from storage import UserDatabase
+from payouts import LocalStubProvider, Payout, PayoutProcessor
+from payout_log import PAYOUT_STATUSES, PayoutLog
+from export import EXPORT_FORMATS, export_file, iter_csv, iter_parquet, parquet_supported
+from rollups import Rollups
+from profiling import Profiler
+from compliance import COMPLIANCE_RULES, EDITABLE_COLUMNS, ComplianceEngine
+from ledger import BALANCE_COLUMNS, WalletLedger
+from newsletter import LocalSMTPServer, NewsletterDispatcher, SMTPConnectionPool
+from snapshot import SharedDataset, load_components, save_components
+from metrics import DEFAULT_REFRESH_INTERVAL, MetricsRefresher, compute_metrics
+
 # Generate demo data
-@st.cache_data
-def generate_demo_users(count=50):
-    """Generate realistic demo user data"""
-    first_names = ["John", "Jane", "Michael", "Sarah", "David", "Emma", "Chris", "Lisa", "Alex", "Maria", "James", "Anna", "Robert", "Emily", "Daniel", "Jessica", "Matthew", "Ashley", "Andrew", "Amanda"]
-    last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez", "Wilson", "Anderson", "Taylor", "Thomas", "Hernandez", "Moore", "Martin", "Jackson", "Thompson", "White"]
-    domains = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "company.com", "business.org"]
-    statuses = ["verified", "unverified", "in_review", "disabled"]
-    payout_methods = ["ach", "paypal", "venmo", "cash_app", "intl_bank"]
-    
-    users = []
-    for i in range(count):
-        first_name = random.choice(first_names)
-        last_name = random.choice(last_names)
-        email = f"{first_name.lower()}.{last_name.lower()}@{random.choice(domains)}"
-        
-        user = {
-            "id": str(uuid.uuid4()),
-            "first_name": first_name,
-            "last_name": last_name,
-            "email": email,
-            "phone_number": {
-                "country_code": "1",
-                "phone_number": f"415{random.randint(1000000, 9999999)}"
-            },
-            "default_payout_method": random.choice(payout_methods),
-            "default_payout_method_details": {
-                "id": str(uuid.uuid4()),
-                "platform": random.choice(payout_methods),
-                "description": f"{random.choice(payout_methods).upper()} Account",
-                "mask": f"****{random.randint(1000, 9999)}",
-                "country": "US",
-                "currency": "USD"
-            },
-            "wallet": {
-                "amount": random.randint(0, 10000),
-                "withdrawable_amount": random.randint(0, 8000),
-                "credit_balance": random.randint(0, 2000)
-            },
-            "status": random.choice(statuses),
-            "compliance": {
-                "tax_id_collected": random.choice([True, False]),
-                "tax_id_verification": random.choice(["verified", "unsubmitted", "pending"]),
-                "address_collected": random.choice([True, False]),
-                "date_of_birth_collected": random.choice([True, False]),
-                "id_verified": random.choice([True, False]),
-                "flagged": random.choice([True, False]),
-                "flags": {
-                    "ofac": random.choice([True, False]),
-                    "ofac_status": random.choice(["unflagged", "flagged", "pending"])
-                }
-            },
-            "created_date": (datetime.now() - timedelta(days=random.randint(1, 365))).isoformat(),
-            "metadata": {"internal_id": f"user_{random.randint(100000, 999999)}"}
-        }
-        users.append(user)
-    
-    return users
+DEMO_USER_COUNTS = [50, 10_000, 100_000, 1_000_000]
+
+def generate_demo_users(count=50, seed=None):
+    """Generate realistic demo user data as a columnar UserStore (shared via get_shared_dataset)"""
+    return demo_data.generate_users(count, seed=seed)
 
 @st.cache_data
-def generate_analytics_data():
+def generate_analytics_data(seed=None):
     """Generate analytics data for dashboard"""
-    dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='D')
+    return demo_data.generate_analytics_data(start='2024-01-01', end='2024-12-31', seed=seed)
+
+def queue_payout_requests(payout_log, store, eligible, count, seed=None):
+    """Demo withdrawal requests: pending payouts of the withdrawable balance of random eligible users"""
+    payable = np.minimum(store.column("wallet_withdrawable_amount"), store.column("wallet_amount"))[eligible]
+    candidates = eligible[(payable > 0) & (store.column("default_payout_method")[eligible] >= 0)]
+    rows = np.sort(np.random.default_rng(seed).choice(candidates, size=min(count, len(candidates)), replace=False))
+    amounts = np.minimum(store.column("wallet_withdrawable_amount")[rows], store.column("wallet_amount")[rows])
+    return payout_log.append(datetime.now(), rows, amounts, store.column("default_payout_method")[rows])
+
+def build_user_data(count=50, seed=None):
+    """Demo users together with their indexes, rollups, wallet ledger and payout history"""
+    users = generate_demo_users(count, seed)
+    compliance = ComplianceEngine(users)
+    payout_log = PayoutLog(capacity=len(users) + 1024)
+    payout_log.append(**demo_data.generate_payout_history(users, seed=seed))
+    queue_payout_requests(payout_log, users, compliance.rows("payout_eligible"), 100, seed=seed)
+    return {
+        "demo_users": users,
+        "search_index": TrigramIndex.build(users),
+        "filter_index": FilterIndex.build(users),
+        "id_index": HashIndex.build(users, ["id"]),
+        "email_index": HashIndex.build(users, ["email"], normalize=casefold_key),
+        "phone_index": HashIndex.build(users, ["country_code", "phone_number"], normalize=phone_key),
+        "rollups": Rollups.from_store(users),
+        "compliance": compliance,
+        "ledger": WalletLedger.from_store(users),
+        "payout_log": payout_log,
+        # Rows at or past demo_size are users persisted in the database
+        "demo_size": len(users)
+    }
+
+DATASET_SNAPSHOT_DIR = os.environ.get(
+    "DATASET_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".dataset_snapshots")
+)
+DATASET_SNAPSHOT_MAX_AGE = float(os.environ.get("DATASET_SNAPSHOT_MAX_AGE_HOURS", 24)) * 3600
+
+@st.cache_resource
+def get_startup_report():
+    """Process-wide startup timings: how each dataset was loaded and the first render's duration"""
+    return {"datasets": {}}
+
+# Components that keep a reference to the user store, so they are forked along with it
+STORE_DEPENDENTS = ("filter_index", "compliance")
+
+# Components changed when users are added
+USER_COMPONENTS = (
+    "demo_users", "search_index", "id_index", "email_index", "phone_index", "rollups", "ledger"
+)
+
+def fork_components(data, names):
+    """Copy-on-write forks of the named components; every other component is shared with data"""
+    names = set(names)
+    if "demo_users" in names:
+        names.update(STORE_DEPENDENTS)
+    forked = dict(data)
+    for name in names:
+        forked[name] = data[name].fork()
+    if "demo_users" in names:
+        for name in STORE_DEPENDENTS:
+            forked[name].store = forked["demo_users"]
+    return forked
+
+@st.cache_resource(max_entries=2)
+def get_shared_dataset(count=50, seed=None):
+    """Demo dataset shared by all sessions; changes publish a new snapshot (see snapshot.py).
+
+    Warm-loaded from a recent snapshot in DATASET_SNAPSHOT_DIR when there is
+    one (set it to "" to disable); otherwise generated, then saved there in
+    the background for the next server process.
+    """
+    started = time.perf_counter()
+    path = os.path.join(DATASET_SNAPSHOT_DIR, f"demo_{count}_{seed}.pkl") if DATASET_SNAPSHOT_DIR else None
+    components = load_components(path, max_age=DATASET_SNAPSHOT_MAX_AGE) if path else None
+    source = "loaded from snapshot"
+    if components is None:
+        components, source = build_user_data(count, seed), "generated"
+        if path:
+            # Not a daemon thread: a server shutting down finishes the write first
+            threading.Thread(target=save_components, args=(components, path), name="dataset-snapshot").start()
+    get_startup_report()["datasets"][(count, seed)] = (source, time.perf_counter() - started)
+    return SharedDataset(components, fork=fork_components)
+
+@st.cache_resource
+def get_derived_cache():
+    """Filter results and figures shared by all sessions, bounded by DERIVED_CACHE_MB"""
+    return LRUCache(maxsize=4096, max_bytes=int(float(os.environ.get("DERIVED_CACHE_MB", 256)) * 1_000_000))
+
+METRICS_REFRESH_SECONDS = float(os.environ.get("METRICS_REFRESH_SECONDS", DEFAULT_REFRESH_INTERVAL))
+
+@st.cache_resource(max_entries=2)
+def get_metrics_refresher(count=50, seed=None):
+    """Headline metrics of the shared demo dataset, recomputed in the background"""
+    shared = weakref.ref(get_shared_dataset(count, seed))
+
+    def source():
+        # Stops the refresher once the dataset is evicted from the resource cache
+        dataset = shared()
+        if dataset is None:
+            return None
+        return dataset.current.components, dataset.current.version
+
+    return MetricsRefresher(source, interval=METRICS_REFRESH_SECONDS)
+
+USER_DB_PATH = os.environ.get(
+    "DRAGON_PAYOUT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "dragon_payout.db")
+)
+
+@st.cache_resource
+def get_user_database(path=USER_DB_PATH):
+    """Persistent user database shared by all sessions (one connection pool per process)"""
+    return UserDatabase(path)
+
+user_db = get_user_database()
+
+@st.cache_resource
+def get_payout_processor():
+    """Payout worker pool shared by all sessions (local stub provider in demo mode)"""
+    return PayoutProcessor(LocalStubProvider())
+
+@st.cache_resource
+def get_local_smtp_server():
+    """In-process SMTP stand-in used when no SMTP_HOST is configured (demo mode)"""
+    return LocalSMTPServer()
+
+@st.cache_resource
+def get_newsletter_dispatcher():
+    """Newsletter sender shared by all sessions; SMTP and rate settings come from the environment"""
+    host = os.environ.get("SMTP_HOST")
+    if host:
+        port = int(os.environ.get("SMTP_PORT", 587))
+    else:
+        server = get_local_smtp_server()
+        host, port = server.host, server.port
+    connections = SMTPConnectionPool(
+        host,
+        port,
+        size=int(os.environ.get("NEWSLETTER_CONNECTIONS", 4)),
+        username=os.environ.get("SMTP_USER"),
+        password=os.environ.get("SMTP_PASSWORD"),
+        starttls=os.environ.get("SMTP_STARTTLS", "").lower() in ("1", "true", "yes")
+    )
+    return NewsletterDispatcher(connections, rate_limit=float(os.environ.get("NEWSLETTER_RATE_LIMIT", 200)))
+
+def claim_pending_payouts(data):
+    """Move pending payouts to processing for a new run; returns their log rows"""
+    payout_log = data["payout_log"]
+    rows = payout_log.open_rows("pending")
+    if not len(rows):
+        # Demo mode: simulate a fresh batch of withdrawal requests
+        rows = queue_payout_requests(
+            payout_log, data["demo_users"], data["compliance"].rows("payout_eligible"), random.randint(50, 150)
+        )
+    if len(rows):
+        payout_log.set_status(rows, "processing", datetime.now())
+    return rows
+
+def settle_payouts(dataset, refresher, rows, payouts, progress):
+    """Record a finished payout run: final log statuses and wallet debits.
+
+    Runs on a payout worker (see PayoutProcessor.submit), so the results
+    land even if the session that started the run has gone away.
+    """
+    settled_ids = {payout.payout_id for payout in progress.settled}
+    settled = np.array([payout.payout_id in settled_ids for payout in payouts], dtype=bool)
     
-    # Daily signups
-    daily_signups = pd.DataFrame({
-        'date': dates,
-        'signups': [random.randint(5, 50) for _ in range(len(dates))]
-    })
+    def apply(data):
+        data["payout_log"].set_status(rows[settled], "completed", datetime.now())
+        data["payout_log"].set_status(rows[~settled], "failed", datetime.now())
+        if progress.settled:
+            apply_wallet_entries(
+                data,
+                [data["id_index"].first(payout.user_id) for payout in progress.settled],
+                "payout",
+                [payout.amount for payout in progress.settled]
+            )
     
-    # Monthly revenue
-    monthly_dates = pd.date_range(start='2024-01-01', end='2024-12-31', freq='M')
-    monthly_revenue = pd.DataFrame({
-        'month': monthly_dates,
-        'revenue': [random.randint(50000, 200000) for _ in range(len(monthly_dates))]
-    })
+    publish_data(dataset, refresher, ["payout_log", "ledger", "demo_users"], apply)
+
+def payouts_for(rows):
+    """Payout requests for payout log rows, keyed by their logged payout ids"""
+    frame = payout_log.frame(rows)
+    return [
+        Payout(user_id=demo_users.column("id")[user_row], amount=int(amount), method=method, payout_id=payout_id)
+        for payout_id, user_row, amount, method in zip(frame["payout_id"], frame["user_row"], frame["amount"], frame["method"])
+    ]
+
+# Profiling mode (sidebar toggle): per-section timing and allocation spans
+if "profiler" not in st.session_state:
+    st.session_state.profiler = Profiler()
+profiler = st.session_state.profiler
+profiler.set_enabled(st.session_state.get("profiling", False))
+profiler.start_rerun()
+
+# Load demo data: every session reads the current snapshot of one shared dataset
+with profiler.span("Data load"):
+    shared_dataset = get_shared_dataset(*demo_key)
+st.session_state.demo_key = demo_key
+derived_cache = get_derived_cache()
+metrics_refresher = get_metrics_refresher(*demo_key)
+
+DATASET_NAMES = (
+    "demo_users", "search_index", "filter_index", "id_index", "email_index", "phone_index",
+    "rollups", "compliance", "ledger", "payout_log", "demo_size"
+)
+
+def bind_dataset():
+    """Point the module-level data names at the current shared snapshot"""
+    global snapshot
+    snapshot = shared_dataset.current
+    globals().update({name: snapshot[name] for name in DATASET_NAMES})
+
+def publish_data(dataset, refresher, names, apply):
+    """Publish apply(data) on forks of the named components as a new snapshot; returns apply's result.
+
+    Touches no module-level names, so background workers can call it.
+    """
+    def apply_and_screen(data):
+        result = apply(data)
+        # Screen changed rows before publishing so readers never refresh a shared engine
+        data["compliance"].refresh()
+        return result
     
-    # Payout method distribution
-    payout_dist = pd.DataFrame({
-        'method': ['ACH', 'PayPal', 'Venmo', 'Cash App', 'International Bank'],
-        'count': [random.randint(100, 500) for _ in range(5)]
+    result = dataset.update(names, apply_and_screen)
+    refresher.notify()
+    return result
+
+def write_data(names, apply):
+    """publish_data() on this session's dataset, then rebind the module-level data names"""
+    result = publish_data(shared_dataset, metrics_refresher, names, apply)
+    bind_dataset()
+    return result
+
+bind_dataset()
+
+# Daily signups chart ranges (label -> trailing days, None for everything)
+SIGNUP_RANGES = {
+    "Last 30 Days": 30,
+    "Last 90 Days": 90,
+    "Last Year": 365,
+    "All Time": None
+}
+
+# Users table sort options (label -> store column)
+SORT_COLUMNS = {
+    "Default": None,
+    "Name": "last_name",
+    "Email": "email",
+    "Status": "status",
+    "Wallet": "wallet_amount",
+    "Created": "created_date"
+}
+
+def filter_users(status_filter, payout_filter, search_term, sort_column=None, descending=False):
+    """Row indices matching the Users tab filters, cached per filter combination"""
+    key = (snapshot.token, "users", status_filter, payout_filter, search_term.lower(), sort_column, descending)
+    
+    def build():
+        criteria = {}
+        if status_filter != "All":
+            criteria["status"] = status_filter
+        if payout_filter != "All":
+            criteria["default_payout_method"] = payout_filter
+        rows = filter_index.select(**criteria)
+        if search_term:
+            rows = search_index.search(search_term, rows=rows)
+        if sort_column:
+            rows = demo_users.order(rows, sort_column, descending=descending)
+        elif descending:
+            rows = rows[::-1]
+        return rows
+    
+    return derived_cache.get_or_build(key, build)
+
+def format_user_page(rows):
+    """Format only the given rows for the Users table"""
+    return pd.DataFrame({
+        "👤 Name": [f"{first} {last}" for first, last in zip(demo_users.column("first_name")[rows], demo_users.column("last_name")[rows])],
+        "📧 Email": demo_users.column("email")[rows],
+        "📱 Phone": [f"+{code} {number}" for code, number in zip(demo_users.column("country_code")[rows], demo_users.column("phone_number")[rows])],
+        "✅ Status": [status.title() for status in demo_users.decoded("status", rows)],
+        "💰 Wallet": [f"${amount:,}" for amount in demo_users.column("wallet_amount")[rows]],
+        "💳 Payout": [method.upper() for method in demo_users.decoded("default_payout_method", rows)],
+        "🆔 ID": [user_id[:8] + "..." for user_id in demo_users.column("id")[rows]]
     })
+
+def add_users(data, users):
+    """Append users to a dataset's store and keep every index in sync; returns their rows"""
+    store = data["demo_users"]
+    rows = store.extend(users)
+    for row, user in zip(rows, users):
+        data["search_index"].add_user(row, user)
+        data["filter_index"].add(row)
+        data["id_index"].add(row, [user["id"]])
+        data["email_index"].add(row, [user["email"]])
+        data["phone_index"].add(row, [user["phone_number"]["country_code"], user["phone_number"]["phone_number"]])
+    data["rollups"].add_rows(store, rows)
+    data["ledger"].open_accounts(
+        rows,
+        np.column_stack([store.column(column)[rows] for column in BALANCE_COLUMNS]),
+        datetime.now()
+    )
+    # Screen new rows now so readers of a shared snapshot never refresh it concurrently
+    data["compliance"].refresh()
+    return rows
+
+def apply_wallet_entries(data, rows, kind, amounts):
+    """Append wallet ledger entries and write the resulting balances back to the affected users"""
+    ledger, store = data["ledger"], data["demo_users"]
+    ledger.post(rows, kind, amounts, datetime.now())
+    for row in np.unique(rows).tolist():
+        balances = ledger.balance(row)
+        store.update(row, balances)
+        if row >= data["demo_size"]:
+            user_db.update_user(store.column("id")[row], balances)
+
+def update_compliance(row, values):
+    """Change compliance fields of one user, re-screening and re-indexing only that row"""
+    unknown = set(values) - EDITABLE_COLUMNS
+    if unknown:
+        raise KeyError(f"not editable compliance fields: {sorted(unknown)}")
+    
+    def apply(data):
+        store = data["demo_users"]
+        previous = store.update(row, values)
+        for column, old in previous.items():
+            data["filter_index"].update(row, column, old, store.column(column)[row].item())
+        data["compliance"].invalidate([row])
     
-    return daily_signups, monthly_revenue, payout_dist
+    # Forking the store forks the filter index and compliance engine with it
+    write_data(["demo_users"], apply)
+    if row >= demo_size:
+        user_db.update_user(demo_users.column("id")[row], values)
 
-# Load demo data
-demo_users = generate_demo_users()
-daily_signups, monthly_revenue, payout_dist = generate_analytics_data()
+def sync_persisted_users():
+    """Pull users persisted since the last sync (from any session) into the shared dataset"""
+    version = snapshot.version
+    shared_dataset.advance(USER_COMPONENTS, user_db.users_since, add_users)
+    bind_dataset()
+    if snapshot.version != version:
+        metrics_refresher.notify()
 
-# Header
-st.markdown("""
-<div class="main-header">
-    <h1>🐉 Dragon Payout Dashboard</h1>
-    <p>Powerful user management and analytics platform</p>
-</div>
-""", unsafe_allow_html=True)
+def current_metrics():
+    """Headline metrics for the current snapshot.
+
+    Normally the background refresher's latest metrics; computed once
+    here when the refresher has not caught up with a change yet.
+    """
+    metrics = metrics_refresher.snapshot
+    if metrics.data_version < snapshot.version:
+        metrics = derived_cache.get_or_build(
+            (snapshot.token, "metrics", datetime.now().date()),
+            lambda: compute_metrics(snapshot.components, data_version=snapshot.version)
+        )
+    return metrics
+
+def metrics_freshness(metrics):
+    """Caption telling how current the metric cards are"""
+    if metrics.age > 3 * METRICS_REFRESH_SECONDS:
+        st.caption(f"⚠️ Metrics are {metrics.age:.0f}s old, refreshing...")
+    else:
+        st.caption(f"🕒 Metrics updated {metrics.age:.0f}s ago (every {METRICS_REFRESH_SECONDS:g}s)")
+
+def duplicate_conflicts(email, country_code, phone_number):
+    """Existing users a new user would duplicate, as {field label: row}"""
+    conflicts = {}
+    if (row := email_index.first(email)) is not None:
+        conflicts["Email"] = row
+    if (row := phone_index.first(country_code, phone_number)) is not None:
+        conflicts["Phone number"] = row
+    return conflicts
+
+def duplicate_report():
+    """(clusters, users involved): one row per group of users sharing an email or phone number, largest first"""
+    def build():
+        first_names, last_names = demo_users.column("first_name"), demo_users.column("last_name")
+        records = []
+        involved = set()
+        for match, index in (("Email", email_index), ("Phone", phone_index)):
+            for key, rows in index.duplicates():
+                records.append((
+                    match,
+                    key if match == "Email" else f"+{key[0]} {key[1]}",
+                    len(rows),
+                    ", ".join(f"{first_names[row]} {last_names[row]}" for row in rows[:3])
+                ))
+                involved.update(rows)
+        return pd.DataFrame.from_records(records, columns=["Match", "Value", "Users", "Examples"]), len(involved)
+    
+    return derived_cache.get_or_build((snapshot.token, "duplicates"), build)
+
+TYPEAHEAD_LIMIT = 20
+
+def find_users(query, limit=TYPEAHEAD_LIMIT):
+    """Top matches for the User Details type-ahead: exact id/email hits first, then substring matches"""
+    query = query.strip()
+    rows = [*id_index.get(query), *email_index.get(query)]
+    rows.extend(search_index.search(query, limit=limit).tolist())
+    return list(dict.fromkeys(rows))[:limit]
+
+with profiler.span("Sync persisted users"):
+    sync_persisted_users()
+with profiler.span("Analytics data"):
+    _, monthly_revenue, _ = generate_analytics_data(seed=demo_key[1])
+loading.empty()
 
 # Sidebar
 with st.sidebar:
-    st.markdown('<div class="sidebar-logo">🐉 Dragon Payout</div>', unsafe_allow_html=True)
-    
     st.markdown("### 📊 Quick Stats")
-    total_users = len(demo_users)
-    verified_users = len([u for u in demo_users if u["status"] == "verified"])
-    total_wallet_value = sum([u["wallet"]["amount"] for u in demo_users])
     
-    st.metric("Total Users", f"{total_users:,}")
-    st.metric("Verified Users", f"{verified_users:,}")
-    st.metric("Total Wallet Value", f"${total_wallet_value:,}")
+    # Re-reads the published metrics on the refresh interval; only this fragment reruns
+    @st.fragment(run_every=METRICS_REFRESH_SECONDS)
+    def quick_stats():
+        with profiler.span("Sidebar Quick Stats"):
+            metrics = current_metrics()
+            st.metric("Total Users", f"{metrics.total_users:,}")
+            st.metric("Verified Users", f"{metrics.verified_users:,}")
+            st.metric("Total Wallet Value", f"${metrics.total_wallet_value:,}")
+            metrics_freshness(metrics)
+    
+    quick_stats()
     
     st.markdown("---")
     st.markdown("### 🔧 Demo Mode")
     st.info("This dashboard uses simulated data for demonstration purposes.")
+    st.selectbox(
+        "Demo users",
+        options=DEMO_USER_COUNTS,
+        format_func=lambda n: f"{n:,}",
+        key="demo_user_count",
+        help="Size of the generated dataset (for load testing)"
+    )
+    st.number_input("Random seed", min_value=0, value=42, step=1, key="demo_seed")
+    st.caption(f"Data: shared snapshot v{snapshot.version}")
+    st.caption(
+        f"Derived cache: {len(derived_cache):,} entries, "
+        f"{derived_cache.nbytes / 1e6:,.1f} of {derived_cache.max_bytes / 1e6:,.0f} MB, "
+        f"{derived_cache.hit_rate:.0%} hits, {derived_cache.evictions:,} evictions"
+    )
+    startup_caption = st.empty()
+    
+    st.markdown("---")
+    st.markdown("### ⏱️ Profiling")
+    st.toggle("Profile reruns", key="profiling", help="Time each section of the dashboard and track allocations")
+    profile_panel = st.container()
+
+def newsletter_status():
+    """Progress of this session's newsletter dispatch (runs in the background)"""
+    progress = st.session_state.get("newsletter")
+    if progress is None:
+        return
+    if not progress.done:
+        st.progress(
+            progress.fraction,
+            text=f"Sending newsletter... {progress.sent + progress.failed:,}/{progress.total:,} "
+                 f"({progress.throughput:,.0f}/s)"
+        )
+        st.button("⏹️ Cancel sending", on_click=progress.cancel)
+    elif progress.cancelled:
+        st.warning(f"Newsletter cancelled after {progress.sent:,} of {progress.total:,} messages")
+    elif progress.failed:
+        st.warning(f"Newsletter sent to {progress.sent:,} users, {progress.failed:,} failed after {progress.retries} retries")
+    else:
+        st.success(f"Newsletter sent to {progress.sent:,} users in {progress.elapsed:.1f}s ({progress.throughput:,.0f}/s)")
+
+# Polls while a dispatch is running; only this fragment reruns
+live_newsletter_status = st.fragment(run_every=1.0)(newsletter_status)
+
+def payout_run_status():
+    """Progress, then outcome, of this session's latest payout run (runs in the background)"""
+    progress = st.session_state.get("payout_run")
+    if progress is None:
+        return
+    if not progress.done:
+        st.progress(
+            progress.fraction,
+            text=f"Processing payouts... {progress.completed + progress.failed}/{progress.total} "
+                 f"({progress.throughput:,.0f}/s)"
+        )
+        return
+    st.progress(1.0, text=f"Done in {progress.elapsed:.1f}s ({progress.throughput:,.0f} payouts/s)")
+    if progress.failed:
+        st.warning(f"Processed {progress.completed} payouts, {progress.failed} failed after {progress.retries} retries")
+    else:
+        st.success(f"Successfully processed {progress.completed} payouts!")
+        if not st.session_state.get("payout_run_announced"):
+            st.balloons()
+    st.session_state.payout_run_announced = True
+    st.caption(" · ".join(f"{method.upper()}: {count}" for method, count in sorted(progress.by_method.items())))
 
-# Main content tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Analytics", "👥 Users", "➕ Create User", "🔍 User Details", "💰 Payouts"])
+@st.fragment(run_every=0.5)
+def live_payout_run_status():
+    """Polls while a payout run is in flight; only this fragment reruns until it finishes"""
+    if st.session_state.payout_run.done:
+        # settle_payouts has published the results; rerun everything so the stats and tables show them
+        st.rerun()
+    payout_run_status()
 
-with tab1:
+# Main content sections. Each section is a fragment: interacting with its
+# widgets reruns only that section, and only the selected section runs at all.
+@st.fragment
+def render_analytics():
+    # Plotly is imported on first use so other sections never pay for it
+    from charts import payout_methods_figure, revenue_figure, signups_figure
+    
     st.header("📊 Analytics Dashboard")
     
-    # Key metrics row
+    # Key metrics row (precomputed, see current_metrics)
+    metrics = current_metrics()
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric(
             "Total Users", 
-            f"{len(demo_users):,}",
-            delta=f"+{random.randint(5, 25)} this week"
+            f"{metrics.total_users:,}",
+            delta=f"+{metrics.new_users_week:,} this week"
         )
     
     with col2:
-        verified_rate = (verified_users / total_users) * 100
-        st.metric(
-            "Verification Rate",
-            f"{verified_rate:.1f}%",
-            delta=f"+{random.randint(1, 5):.1f}%"
-        )
+        st.metric("Verification Rate", f"{metrics.verification_rate * 100:.1f}%")
     
     with col3:
-        avg_wallet = total_wallet_value / total_users
         st.metric(
             "Avg Wallet Balance",
-            f"${avg_wallet:.0f}",
-            delta=f"+${random.randint(10, 50)}"
+            f"${metrics.avg_wallet:.0f}",
+            delta=f"{'+' if metrics.avg_wallet >= metrics.avg_wallet_week_ago else '-'}"
+                  f"${abs(metrics.avg_wallet - metrics.avg_wallet_week_ago):,.0f} vs last week"
         )
     
     with col4:
-        active_payouts = random.randint(150, 300)
         st.metric(
             "Active Payouts",
-            f"{active_payouts}",
-            delta=f"+{random.randint(5, 20)}"
+            f"{metrics.open_payouts:,}",
+            help="Payouts pending or processing"
         )
+    metrics_freshness(metrics)
     
     st.markdown("---")
     
@@ -224,40 +660,35 @@ with tab1:
     
     with col1:
         st.subheader("📈 Daily User Signups")
-        fig = px.line(
-            daily_signups.tail(30), 
-            x='date', 
-            y='signups',
-            title="Last 30 Days",
-            color_discrete_sequence=['#FF6B35']
-        )
-        fig.update_layout(showlegend=False)
-        st.plotly_chart(fig, use_container_width=True)
+        signup_range = st.selectbox("Range", options=list(SIGNUP_RANGES), label_visibility="collapsed")
+        # Figures are rebuilt only when the data they are drawn from changes
+        with profiler.span("Chart: daily signups"):
+            fig = derived_cache.get_or_build(
+                (snapshot.token, "signups", signup_range),
+                lambda: signups_figure(
+                    rollups.signups_series("day", last=SIGNUP_RANGES[signup_range]),
+                    title=signup_range
+                )
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("🥧 Payout Methods")
-        fig = px.pie(
-            payout_dist, 
-            values='count', 
-            names='method',
-            color_discrete_sequence=px.colors.sequential.Sunset
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with profiler.span("Chart: payout methods"):
+            fig = derived_cache.get_or_build(
+                (snapshot.token, "payout_methods"),
+                lambda: payout_methods_figure(rollups.payout_method_distribution())
+            )
+            st.plotly_chart(fig, use_container_width=True)
     
     # Monthly revenue chart
     st.subheader("💵 Monthly Revenue Trend")
-    fig = px.bar(
-        monthly_revenue, 
-        x='month', 
-        y='revenue',
-        title="Revenue by Month",
-        color='revenue',
-        color_continuous_scale='Sunset'
-    )
-    fig.update_layout(showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    with profiler.span("Chart: monthly revenue"):
+        fig = derived_cache.get_or_build(("revenue", demo_key), lambda: revenue_figure(monthly_revenue))
+        st.plotly_chart(fig, use_container_width=True)
 
-with tab2:
+@st.fragment
+def render_users():
     st.header("👥 User Management")
     
     # Filters
@@ -266,54 +697,53 @@ with tab2:
     with col1:
         status_filter = st.selectbox(
             "Filter by Status",
-            options=["All", "verified", "unverified", "in_review", "disabled"]
+            options=["All", *STATUSES]
         )
     
     with col2:
         payout_filter = st.selectbox(
             "Filter by Payout Method",
-            options=["All", "ach", "paypal", "venmo", "cash_app", "intl_bank"]
+            options=["All", *PAYOUT_METHODS]
         )
     
     with col3:
         search_term = st.text_input("🔍 Search users", placeholder="Name or email...")
     
-    # Filter users
-    filtered_users = demo_users.copy()
+    # Sorting and paging
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        sort_label = st.selectbox("Sort by", options=list(SORT_COLUMNS))
     
-    if status_filter != "All":
-        filtered_users = [u for u in filtered_users if u["status"] == status_filter]
+    with col2:
+        sort_descending = st.selectbox("Order", options=["Ascending", "Descending"]) == "Descending"
     
-    if payout_filter != "All":
-        filtered_users = [u for u in filtered_users if u["default_payout_method"] == payout_filter]
+    with col3:
+        page_size = st.selectbox("Rows per page", options=[25, 50, 100, 250], index=1)
     
-    if search_term:
-        search_lower = search_term.lower()
-        filtered_users = [
-            u for u in filtered_users 
-            if search_lower in u["first_name"].lower() 
-            or search_lower in u["last_name"].lower() 
-            or search_lower in u["email"].lower()
-        ]
+    # Filter users (row indices into the columnar store, nothing formatted yet)
+    with profiler.span("Users: filter"):
+        filtered_users = filter_users(
+            status_filter, payout_filter, search_term,
+            sort_column=SORT_COLUMNS[sort_label], descending=sort_descending
+        )
+    page_count = max(1, -(-len(filtered_users) // page_size))
+    
+    with col4:
+        if st.session_state.get("users_page", 1) > page_count:
+            st.session_state.users_page = page_count
+        page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="users_page")
+    
+    page_start = (page - 1) * page_size
+    page_rows = filtered_users[page_start:page_start + page_size]
     
     st.write(f"**Showing {len(filtered_users)} of {len(demo_users)} users**")
     
-    # User table
-    if filtered_users:
-        user_data = []
-        for user in filtered_users:
-            status_class = f"status-{user['status'].replace(' ', '_')}"
-            user_data.append({
-                "👤 Name": f"{user['first_name']} {user['last_name']}",
-                "📧 Email": user["email"],
-                "📱 Phone": f"+{user['phone_number']['country_code']} {user['phone_number']['phone_number']}",
-                "✅ Status": user["status"].title(),
-                "💰 Wallet": f"${user['wallet']['amount']:,}",
-                "💳 Payout": user["default_payout_method"].upper(),
-                "🆔 ID": user["id"][:8] + "..."
-            })
-        
-        df = pd.DataFrame(user_data)
+    # User table (current page only)
+    if len(filtered_users):
+        st.caption(f"Rows {page_start + 1:,}–{page_start + len(page_rows):,} · page {page} of {page_count}")
+        with profiler.span("Users: format page"):
+            df = format_user_page(page_rows)
         
         # Display with styling
         st.dataframe(
@@ -338,20 +768,71 @@ with tab2:
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            if st.button("📧 Send Newsletter", help="Send newsletter to filtered users"):
-                st.success(f"Newsletter sent to {len(filtered_users)} users!")
+            with st.expander("✉️ Newsletter"):
+                newsletter_subject = st.text_input("Subject", value="Dragon Payout News")
+                newsletter_body = st.text_area("Message", value="Hi {first_name},\n\nHere is what's new at Dragon Payout.")
+                dispatcher = get_newsletter_dispatcher()
+                st.caption(f"Sending at up to {dispatcher.limiter.rate:,.0f} messages/s over {dispatcher.connections.size} connections")
+            sending = st.session_state.get("newsletter") is not None and not st.session_state.newsletter.done
+            if st.button("📧 Send Newsletter", help="Send newsletter to filtered users", disabled=sending):
+                try:
+                    st.session_state.newsletter = dispatcher.submit(
+                        list(zip(demo_users.column("email")[filtered_users], demo_users.column("first_name")[filtered_users])),
+                        newsletter_subject,
+                        newsletter_body
+                    )
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+            if st.session_state.get("newsletter") is not None:
+                if st.session_state.newsletter.done:
+                    newsletter_status()
+                else:
+                    live_newsletter_status()
         
         with col2:
             if st.button("💰 Process Payouts", help="Process pending payouts"):
                 st.success("Payouts processed successfully!")
         
         with col3:
-            if st.button("📊 Export Data", help="Export filtered data to CSV"):
-                st.success("Data exported to CSV!")
+            export_format = st.selectbox("Export format", options=list(EXPORT_FORMATS), label_visibility="collapsed")
+            extension, mime = EXPORT_FORMATS[export_format]
+            if extension == "parquet" and not parquet_supported():
+                st.error("❌ Parquet export requires pyarrow (pip install pyarrow)")
+            else:
+                export_stream = iter_parquet if extension == "parquet" else iter_csv
+                # Built only when clicked, off the script thread, spooled through a temp file chunk by chunk
+                st.download_button(
+                    "📊 Export Data",
+                    data=lambda store=demo_users, rows=filtered_users: export_file(export_stream(store, rows), f".{extension}"),
+                    file_name=f"dragon_payout_users.{extension}",
+                    mime=mime,
+                    on_click="ignore",
+                    help=f"Export the {len(filtered_users):,} filtered users to CSV or Parquet"
+                )
+    
+    # Duplicate detection runs over the whole population, not just the filtered users
+    with st.expander("🧬 Duplicate Users"):
+        st.caption("Users sharing an email address (ignoring case) or a phone number (ignoring formatting)")
+        if st.toggle("Find duplicates", key="show_duplicates"):
+            with profiler.span("Users: duplicate report"):
+                clusters, involved = duplicate_report()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Email clusters", f"{(clusters['Match'] == 'Email').sum():,}")
+            col2.metric("Phone clusters", f"{(clusters['Match'] == 'Phone').sum():,}")
+            col3.metric("Users involved", f"{involved:,}")
+            st.dataframe(clusters.head(1_000), use_container_width=True, hide_index=True)
+            if len(clusters) > 1_000:
+                st.caption(f"Showing the 1,000 largest of {len(clusters):,} clusters")
 
-with tab3:
+@st.fragment
+def render_create_user():
     st.header("➕ Create New User")
     
+    mode = st.radio("Mode", options=["Single user", "Bulk import"], horizontal=True, label_visibility="collapsed")
+    if mode == "Bulk import":
+        render_bulk_import()
+        return
+    
     with st.form("create_user_form", clear_on_submit=True):
         col1, col2 = st.columns(2)
         
@@ -363,7 +844,7 @@ with tab3:
             
         with col2:
             st.subheader("📱 Contact Information")
-            country_code = st.selectbox("Country Code *", options=["1", "44", "33", "49", "81"], index=0)
+            country_code = st.selectbox("Country Code *", options=COUNTRY_CODES, index=0)
             phone_number = st.text_input("Phone Number *", placeholder="4155551234")
             username = st.text_input("Username", placeholder="johndoe (optional)")
         
@@ -373,7 +854,7 @@ with tab3:
             st.subheader("💳 Payout Preferences")
             payout_method = st.selectbox(
                 "Default Payout Method",
-                options=["ach", "paypal", "venmo", "cash_app", "intl_bank"],
+                options=PAYOUT_METHODS,
                 format_func=lambda x: x.upper()
             )
             
@@ -392,8 +873,18 @@ with tab3:
         submitted = st.form_submit_button("🚀 Create User", type="primary", use_container_width=True)
         
         if submitted:
+            # Pick up users created in other sessions before checking for duplicates
+            sync_persisted_users()
+            conflicts = duplicate_conflicts(email, country_code, phone_number)
             if not all([first_name, last_name, email, phone_number]):
                 st.error("❌ Please fill in all required fields")
+            elif conflicts:
+                for label, row in conflicts.items():
+                    existing = demo_users.record(row)
+                    st.error(
+                        f"❌ {label} is already used by {existing['first_name']} {existing['last_name']} "
+                        f"({existing['id']})"
+                    )
             else:
                 # Simulate user creation
                 new_user_id = str(uuid.uuid4())
@@ -430,23 +921,90 @@ with tab3:
                     st.info(f"**Email:** {email}")
                     st.info(f"**Payout Method:** {payout_method.upper()}")
                 
-                # Store for easy access
+                # Store for easy access, persist it and make it searchable
                 st.session_state.last_created_user = new_user
+                user_db.insert_users([new_user])
+                sync_persisted_users()
+
+def render_bulk_import():
+    from importer import import_users
+    
+    st.subheader("📥 Bulk Import")
+    st.caption(
+        "CSV or JSONL with the same columns as the export: first_name, last_name, email, "
+        "phone_number.country_code and phone_number.phone_number are required; id, status, "
+        "default_payout_method, wallet.* and created_date are optional."
+    )
+    uploaded = st.file_uploader("Users file", type=["csv", "jsonl"])
+    if uploaded is None:
+        return
+    import_format = "jsonl" if uploaded.name.lower().endswith(".jsonl") else "csv"
+    
+    if st.button("📥 Import Users", type="primary", use_container_width=True):
+        progress_bar = st.progress(0.0, text="Importing users...")
+        total_bytes = max(uploaded.size, 1)
+        
+        def on_progress(report):
+            progress_bar.progress(
+                min(uploaded.tell() / total_bytes, 1.0),
+                text=f"Importing users... {report.total:,} read, {report.imported:,} imported "
+                     f"({report.throughput:,.0f}/s)"
+            )
+        
+        # Known ids are rejected up front; ids stored by other sessions but not synced yet are skipped on insert
+        sync_persisted_users()
+        report = import_users(
+            uploaded,
+            import_format,
+            insert=user_db.insert_new_users,
+            exists=lambda user_id: bool(id_index.get(user_id)),
+            on_progress=on_progress
+        )
+        sync_persisted_users()
+        progress_bar.progress(1.0, text=f"Done in {report.elapsed:.1f}s ({report.throughput:,.0f} records/s)")
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Imported", f"{report.imported:,}")
+        col2.metric("Rejected", f"{report.invalid:,}")
+        col3.metric("Throughput", f"{report.throughput:,.0f}/s")
+        if report.invalid:
+            st.warning(f"{report.invalid:,} of {report.total:,} rows were rejected")
+            st.dataframe(report.errors_frame(), use_container_width=True, hide_index=True)
+            if report.invalid > len(report.errors):
+                st.caption(f"Showing the first {len(report.errors):,} errors")
+        else:
+            st.success(f"✅ Imported all {report.imported:,} users")
 
-with tab4:
+@st.fragment
+def render_user_details():
     st.header("🔍 User Details")
     
     if hasattr(st.session_state, 'last_created_user'):
         st.info(f"💡 Last created user: {st.session_state.last_created_user['first_name']} {st.session_state.last_created_user['last_name']}")
     
-    # User selection
-    user_options = [f"{u['first_name']} {u['last_name']} ({u['email']})" for u in demo_users]
-    selected_user_display = st.selectbox("Select User", options=user_options)
+    # User selection: type-ahead over the indexes, only the top matches are sent to the browser
+    user_query = st.text_input("🔎 Find user", placeholder="Name, email or user ID...")
+    user_options = find_users(user_query)
+    if hasattr(st.session_state, 'last_created_user') and not user_query:
+        last_created_row = id_index.first(st.session_state.last_created_user["id"])
+        if last_created_row is not None:
+            user_options = [last_created_row, *[row for row in user_options if row != last_created_row]][:TYPEAHEAD_LIMIT]
+    
+    selected_index = st.selectbox(
+        "Select User",
+        options=user_options,
+        format_func=lambda row: f"{demo_users.column('first_name')[row]} {demo_users.column('last_name')[row]} ({demo_users.column('email')[row]})"
+    )
+    if user_query and not user_options:
+        st.warning("No users match your search.")
     
-    if selected_user_display:
-        # Find selected user
-        selected_index = user_options.index(selected_user_display)
-        selected_user = demo_users[selected_index]
+    if selected_index is not None:
+        # Find selected user (row index from the type-ahead)
+        if selected_index >= demo_size:
+            # Persisted users are read fresh from the database by id
+            selected_user = user_db.get_user(demo_users.column("id")[selected_index])
+        else:
+            selected_user = demo_users.record(selected_index)
         
         # User overview cards
         col1, col2, col3, col4 = st.columns(4)
@@ -473,7 +1031,7 @@ with tab4:
             st.metric("Payout Method", selected_user['default_payout_method'].upper())
         
         # Detailed information
-        tab_info, tab_compliance, tab_raw = st.tabs(["📋 Information", "🛡️ Compliance", "📄 Raw Data"])
+        tab_info, tab_wallet, tab_compliance, tab_raw = st.tabs(["📋 Information", "💰 Wallet", "🛡️ Compliance", "📄 Raw Data"])
         
         with tab_info:
             col1, col2 = st.columns(2)
@@ -492,6 +1050,46 @@ with tab4:
                 st.write(f"**Credit Balance:** ${selected_user['wallet']['credit_balance']:,}")
                 st.write(f"**Payout Method:** {selected_user['default_payout_method'].upper()}")
         
+        with tab_wallet:
+            # Balances as of a date are replayed from the nearest ledger snapshot
+            as_of = st.date_input("Balance as of", value=datetime.now().date(), key="wallet_as_of")
+            balance_at = ledger.balance_at(selected_index, datetime.combine(as_of, datetime.max.time()))
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Wallet Balance", f"${balance_at['wallet_amount']:,}")
+            col2.metric("Withdrawable", f"${balance_at['wallet_withdrawable_amount']:,}")
+            col3.metric("Credit Balance", f"${balance_at['wallet_credit_balance']:,}")
+            
+            st.subheader("💸 Payouts")
+            user_payouts = payout_log.frame(payout_log.latest(10, user=selected_index))
+            if len(user_payouts):
+                st.dataframe(
+                    pd.DataFrame({
+                        "ID": user_payouts["payout_id"],
+                        "Date": user_payouts["date"],
+                        "Amount": user_payouts["amount"],
+                        "Method": user_payouts["method"].str.upper(),
+                        "Status": user_payouts["status"].str.title()
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.caption("No payouts yet")
+            
+            st.subheader("🧾 Ledger")
+            history = ledger.history(selected_index, limit=50)
+            st.dataframe(
+                pd.DataFrame({
+                    "Date": history["date"],
+                    "Entry": history["kind"].str.title(),
+                    "Wallet": history["wallet_amount"],
+                    "Withdrawable": history["wallet_withdrawable_amount"],
+                    "Credit": history["wallet_credit_balance"]
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+        
         with tab_compliance:
             compliance = selected_user['compliance']
             
@@ -513,28 +1111,80 @@ with tab4:
         with tab_raw:
             st.json(selected_user)
 
-with tab5:
-    st.header("💰 Payout Management")
+@st.fragment
+def render_compliance():
+    st.header("🛡️ Compliance Queues")
     
-    # Payout stats
-    col1, col2, col3, col4 = st.columns(4)
+    # Queue sizes (cached rule masks, only changed users are re-screened)
+    queue_counts = compliance.counts()
+    cols = st.columns(len(COMPLIANCE_RULES))
+    for col, (name, rule) in zip(cols, COMPLIANCE_RULES.items()):
+        with col:
+            st.metric(rule.label, f"{queue_counts[name]:,}", help=rule.description)
     
-    total_payouts = random.randint(500, 1000)
-    pending_payouts = random.randint(50, 150)
-    completed_today = random.randint(20, 80)
-    total_amount = random.randint(500000, 2000000)
-    
-    with col1:
-        st.metric("Total Payouts", f"{total_payouts:,}")
+    queue_name = st.selectbox(
+        "Queue",
+        options=[name for name in COMPLIANCE_RULES if name != "payout_eligible"],
+        format_func=lambda name: COMPLIANCE_RULES[name].label
+    )
+    queue_rows = compliance.rows(queue_name)
+    st.write(f"**{len(queue_rows):,} users in queue** · {COMPLIANCE_RULES[queue_name].description}")
     
-    with col2:
-        st.metric("Pending", f"{pending_payouts}", delta=f"-{random.randint(5, 20)}")
+    if len(queue_rows):
+        visible_rows = queue_rows[:TYPEAHEAD_LIMIT * 5]
+        queue_df = format_user_page(visible_rows)
+        queue_df["🪪 ID Verified"] = ["✅" if value else "❌" for value in demo_users.column("id_verified")[visible_rows]]
+        queue_df["🧾 Tax ID"] = [status.title() for status in demo_users.decoded("tax_id_verification", visible_rows)]
+        queue_df["🚩 Flagged"] = ["⚠️" if value else "" for value in demo_users.column("flagged")[visible_rows]]
+        queue_df["🌐 OFAC"] = [status.title() for status in demo_users.decoded("ofac_status", visible_rows)]
+        st.dataframe(queue_df, use_container_width=True, hide_index=True)
+        if len(queue_rows) > len(visible_rows):
+            st.caption(f"Showing the first {len(visible_rows)} users in this queue")
+        
+        # Review actions
+        st.markdown("### 🧑‍⚖️ Review")
+        review_row = st.selectbox(
+            "User",
+            options=visible_rows.tolist(),
+            format_func=lambda row: f"{demo_users.column('first_name')[row]} {demo_users.column('last_name')[row]} ({demo_users.column('email')[row]})"
+        )
+        # Callbacks run before the rerun, so the queue counts above are already updated
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.button(
+                "🪪 Mark KYC complete",
+                use_container_width=True,
+                on_click=update_compliance,
+                args=(review_row, {
+                    "id_verified": True,
+                    "tax_id_collected": True,
+                    "address_collected": True,
+                    "date_of_birth_collected": True
+                })
+            )
+        with col2:
+            st.button(
+                "🌐 Clear OFAC screening",
+                use_container_width=True,
+                on_click=update_compliance,
+                args=(review_row, {"ofac_status": "unflagged", "ofac": False})
+            )
+        with col3:
+            st.button(
+                "🚩 Remove flag",
+                use_container_width=True,
+                on_click=update_compliance,
+                args=(review_row, {"flagged": False})
+            )
     
-    with col3:
-        st.metric("Completed Today", f"{completed_today}")
+    st.caption(f"Screening work so far: {compliance.rows_evaluated:,} user evaluations")
+
+@st.fragment
+def render_payouts():
+    st.header("💰 Payout Management")
     
-    with col4:
-        st.metric("Total Amount", f"${total_amount:,}")
+    # Payout stats (filled in after any processing below)
+    stats = st.container()
     
     # Payout actions
     st.markdown("### 🚀 Quick Actions")
@@ -542,12 +1192,24 @@ with tab5:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("💸 Process Pending Payouts", type="primary", use_container_width=True):
-            with st.spinner("Processing payouts..."):
-                import time
-                time.sleep(2)
-            st.success(f"Successfully processed {pending_payouts} payouts!")
-            st.balloons()
+        running = st.session_state.get("payout_run") is not None and not st.session_state.payout_run.done
+        if st.button("💸 Process Pending Payouts", type="primary", use_container_width=True, disabled=running):
+            # Claimed inside one update, so concurrent clicks never submit the same payouts
+            pending_rows = write_data(["payout_log"], claim_pending_payouts)
+            if not len(pending_rows):
+                st.info("No payout-eligible users with a withdrawable balance")
+            else:
+                payouts = payouts_for(pending_rows)
+                st.session_state.payout_run = get_payout_processor().submit(
+                    payouts,
+                    on_done=functools.partial(settle_payouts, shared_dataset, metrics_refresher, pending_rows, payouts)
+                )
+                st.session_state.payout_run_announced = False
+        if st.session_state.get("payout_run") is not None:
+            if st.session_state.payout_run.done:
+                payout_run_status()
+            else:
+                live_payout_run_status()
     
     with col2:
         if st.button("📊 Generate Payout Report", use_container_width=True):
@@ -557,25 +1219,55 @@ with tab5:
         if st.button("🔍 Audit Trail", use_container_width=True):
             st.info("Opening audit trail in new window...")
     
-    # Recent payouts table
+    metrics = current_metrics()
+    with stats:
+        stat_cols = st.columns(4)
+        stat_cols[0].metric("Total Payouts", f"{metrics.total_payouts:,}")
+        stat_cols[1].metric("Pending", f"{metrics.open_payouts:,}")
+        stat_cols[2].metric("Completed Today", f"{metrics.completed_today:,}")
+        stat_cols[3].metric("Total Amount", f"${metrics.completed_amount:,}", help="Total of completed payouts")
+        metrics_freshness(metrics)
+    
+    # Recent payouts table (newest first, from the time-indexed payout log)
     st.markdown("### 📋 Recent Payouts")
     
-    # Generate sample payout data
-    recent_payouts = []
-    for i in range(10):
-        user = random.choice(demo_users)
-        recent_payouts.append({
-            "ID": f"PO-{random.randint(10000, 99999)}",
-            "User": f"{user['first_name']} {user['last_name']}",
-            "Amount": f"${random.randint(100, 5000):,}",
-            "Method": user['default_payout_method'].upper(),
-            "Status": random.choice(["Completed", "Pending", "Processing"]),
-            "Date": (datetime.now() - timedelta(days=random.randint(0, 30))).strftime("%Y-%m-%d")
-        })
-    
-    payout_df = pd.DataFrame(recent_payouts)
+    col1, col2 = st.columns(2)
+    with col1:
+        payout_status = st.selectbox("Payout status", options=["All", *PAYOUT_STATUSES], format_func=str.title)
+    with col2:
+        today = datetime.now().date()
+        date_range = st.date_input("Created between", value=(today - timedelta(days=30), today))
+    start_date, end_date = (list(date_range) + [today])[:2] if date_range else (None, today)
+    start = datetime.combine(start_date, datetime.min.time()) if start_date else None
+    end = datetime.combine(end_date, datetime.max.time())
+    
+    range_counts = payout_log.counts(start, end)
+    st.caption(" · ".join(f"{status.title()}: {count:,}" for status, count in range_counts.items()) + " in this range")
+    
+    recent = payout_log.frame(payout_log.latest(10, status=None if payout_status == "All" else payout_status, start=start, end=end))
+    payout_df = pd.DataFrame({
+        "ID": recent["payout_id"],
+        "User": [f"{demo_users.column('first_name')[row]} {demo_users.column('last_name')[row]}" for row in recent["user_row"]],
+        "Amount": [f"${amount:,}" for amount in recent["amount"]],
+        "Method": recent["method"].str.upper(),
+        "Status": recent["status"].str.title(),
+        "Date": recent["date"].dt.strftime("%Y-%m-%d %H:%M")
+    })
     st.dataframe(payout_df, use_container_width=True, hide_index=True)
 
+SECTIONS = {
+    "📊 Analytics": render_analytics,
+    "👥 Users": render_users,
+    "➕ Create User": render_create_user,
+    "🔍 User Details": render_user_details,
+    "🛡️ Compliance": render_compliance,
+    "💰 Payouts": render_payouts
+}
+
+section = st.radio("Section", options=list(SECTIONS), horizontal=True, label_visibility="collapsed", key="section")
+with profiler.span(section):
+    SECTIONS[section]()
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -586,3 +1278,25 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+# Cold start: the first full render in this server process
+startup = get_startup_report()
+startup.setdefault("cold_start", time.perf_counter() - SCRIPT_STARTED)
+dataset_source, dataset_seconds = startup["datasets"].get(demo_key, ("shared", 0.0))
+startup_caption.caption(
+    f"Cold start: {startup['cold_start']:.2f}s to first render "
+    f"(dataset {dataset_source} in {dataset_seconds:.2f}s)"
+)
+
+# Profiling breakdown for this rerun
+profiler.finish_rerun()
+if profiler.enabled:
+    with profile_panel:
+        st.caption(f"Last rerun: {profiler.total * 1000:,.0f} ms in spans · peak {profiler.peak_memory / 1_000_000:,.1f} MB traced")
+        st.dataframe(profiler.breakdown(), use_container_width=True, hide_index=True)
+        st.download_button(
+            "💾 Download trace",
+            data=profiler.chrome_trace(),
+            file_name="dragon_payout_trace.json",
+            mime="application/json",
+            help="Chrome trace-event format (open in chrome://tracing or Perfetto)"
+        )
@@ -0,0 +1,214 @@
+"""Headless rerun-latency benchmarks for the dashboard.
+
+Drives app.py through Streamlit's AppTest harness against synthetic
+datasets of increasing size and times the interactions operators care
+about.  Each dataset size runs in its own subprocess so cold start and
+peak memory are measured from a clean interpreter.
+
+Usage:
+    python benchmarks/bench_app.py                          # 50, 10k and 1M users
+    python benchmarks/bench_app.py --sizes 50,10000 --repeats 10
+    python benchmarks/bench_app.py --compare benchmarks/results/<old>.json
+
+Results are written as JSON (see --output) so runs can be compared.  Note
+that AppTest reruns the whole script on every interaction, so scenario
+timings are full-rerun latencies even where the live app would only rerun
+a fragment.  The CSV export runs as a download callback that AppTest never
+invokes, so export_csv times the export itself over every user.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "app.py")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DEFAULT_SIZES = [50, 10_000, 1_000_000]
+# The sidebar's default "Random seed", so the export covers the same users as the app
+DEMO_SEED = 42
+SEARCH_KEYSTROKES = ["j", "jo", "joh", "john", "john.", "john.s"]
+
+
+def percentiles(samples):
+    samples = np.asarray(samples, dtype=np.float64) * 1000
+    return {
+        "n": len(samples),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p90_ms": float(np.percentile(samples, 90)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "max_ms": float(samples.max()),
+    }
+
+
+def timed(action):
+    start = time.perf_counter()
+    at = action()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def new_session(size, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state["demo_user_count"] = size
+    return at
+
+
+def widget(elements, label):
+    return next(element for element in elements if element.label == label)
+
+
+def run_worker(size, repeats, timeout):
+    """Benchmark one dataset size in this process; returns a result dict"""
+    cold_start = timed(lambda: new_session(size, timeout).run())
+    first_render = [timed(lambda: new_session(size, timeout).run()) for _ in range(repeats)]
+
+    at = new_session(size, timeout).run()
+    at.radio(key="section").set_value("👥 Users").run()
+    scenarios = {"status_filter": [], "search_keystroke": [], "open_user_details": [], "export_csv": []}
+
+    statuses = ["verified", "unverified", "in_review", "disabled", "All"]
+    for i in range(repeats):
+        status = statuses[i % len(statuses)]
+        scenarios["status_filter"].append(
+            timed(lambda: widget(at.selectbox, "Filter by Status").set_value(status).run())
+        )
+    widget(at.selectbox, "Filter by Status").set_value("All").run()
+
+    for _ in range(repeats):
+        for text in SEARCH_KEYSTROKES:
+            scenarios["search_keystroke"].append(
+                timed(lambda: widget(at.text_input, "🔍 Search users").input(text).run())
+            )
+        widget(at.text_input, "🔍 Search users").input("").run()
+
+    # Export Data is a deferred download whose callable never runs in AppTest; time that callable directly
+    sys.path.insert(0, ROOT)
+    import demo_data
+    from export import export_file, iter_csv
+
+    store = demo_data.generate_users(size, seed=DEMO_SEED)
+    rows = np.arange(len(store))
+    for _ in range(repeats):
+        start = time.perf_counter()
+        export_file(iter_csv(store, rows), ".csv").close()
+        scenarios["export_csv"].append(time.perf_counter() - start)
+
+    for _ in range(repeats):
+        at.radio(key="section").set_value("👥 Users").run()
+        scenarios["open_user_details"].append(
+            timed(lambda: at.radio(key="section").set_value("🔍 User Details").run())
+        )
+
+    return {
+        "users": size,
+        "cold_start_ms": cold_start * 1000,
+        "first_render": percentiles(first_render),
+        "scenarios": {name: percentiles(samples) for name, samples in scenarios.items()},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_size(size, repeats, timeout):
+    """Run one size in a fresh interpreter and parse its JSON result"""
+    with tempfile.TemporaryDirectory() as tmp:
+        # A fresh snapshot directory keeps cold start measuring dataset generation
+        env = {**os.environ, "DRAGON_PAYOUT_DB": os.path.join(tmp, "bench.db"),
+               "DATASET_SNAPSHOT_DIR": os.path.join(tmp, "snapshots")}
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", "--sizes", str(size),
+             "--repeats", str(repeats), "--timeout", str(timeout)],
+            env=env, cwd=ROOT, capture_output=True, text=True
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"benchmark for {size:,} users failed:\n{proc.stderr[-4000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _p50s(result):
+    """Flatten a result into {measurement: p50 milliseconds}"""
+    p50s = {"cold_start": result["cold_start_ms"], "first_render": result["first_render"]["p50_ms"]}
+    p50s.update((name, stats["p50_ms"]) for name, stats in result["scenarios"].items())
+    return p50s
+
+
+def print_report(results, baseline=None):
+    baseline = {r["users"]: _p50s(r) for r in (baseline or {}).get("results", [])}
+    for result in results:
+        previous = baseline.get(result["users"], {})
+        print(f"\n== {result['users']:,} users  (peak RSS {result['peak_rss_mb']:.0f} MB)")
+        print(f"  {'cold_start':<20} {result['cold_start_ms']:9.1f} ms")
+        for name, stats in [("first_render", result["first_render"]), *result["scenarios"].items()]:
+            line = f"  {name:<20} p50 {stats['p50_ms']:9.1f} ms   p90 {stats['p90_ms']:9.1f} ms   p99 {stats['p99_ms']:9.1f} ms"
+            if previous.get(name):
+                line += f"   ({stats['p50_ms'] / previous[name]:.2f}x vs baseline)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated dataset sizes (must be offered in the Demo users selector)")
+    parser.add_argument("--repeats", type=int, default=5, help="samples per scenario")
+    parser.add_argument("--timeout", type=float, default=900, help="per-rerun timeout in seconds")
+    parser.add_argument("--output", help="results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    if args.worker:
+        print(json.dumps(run_worker(sizes[0], args.repeats, args.timeout)))
+        return
+
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size:,} users...", file=sys.stderr)
+        results.append(run_size(size, args.repeats, args.timeout))
+
+    import streamlit
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "platform": platform.platform(),
+        "repeats": args.repeats,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Plotly figure builders and time-series downsampling.
+
+app.py caches built figures in the derived-result cache under a key that
+includes the version of the data they were built from, so a rerun
+triggered by an unrelated widget reuses the previous figure object.  Long
+daily series are reduced with Largest-Triangle-Three-Buckets before
+plotting so the browser receives a bounded number of points regardless of
+the date range.
+"""
+
+import numpy as np
+import plotly.express as px
+
+MAX_CHART_POINTS = 500
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns selected indices.
+
+    Keeps the first and last points and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the average of the next bucket.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[previous] - next_x) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample_series(df, x, y, threshold=MAX_CHART_POINTS):
+    """Return df reduced to at most threshold rows with LTTB"""
+    if len(df) <= threshold:
+        return df
+    x_values = df[x].to_numpy()
+    if np.issubdtype(x_values.dtype, np.datetime64):
+        x_values = x_values.astype("datetime64[s]").astype(np.int64)
+    return df.iloc[lttb(x_values, df[y].to_numpy(), threshold)]
+
+
+def signups_figure(signups, title):
+    fig = px.line(
+        downsample_series(signups, "date", "signups"),
+        x='date',
+        y='signups',
+        title=title,
+        color_discrete_sequence=['#FF6B35']
+    )
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+def payout_methods_figure(distribution):
+    return px.pie(
+        distribution,
+        values='count',
+        names='method',
+        color_discrete_sequence=px.colors.sequential.Sunset
+    )
+
+
+def revenue_figure(monthly_revenue):
+    fig = px.bar(
+        monthly_revenue,
+        x='month',
+        y='revenue',
+        title="Revenue by Month",
+        color='revenue',
+        color_continuous_scale='Sunset'
+    )
+    fig.update_layout(showlegend=False)
+    return fig
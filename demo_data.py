@@ -0,0 +1,187 @@
+"""Vectorized synthetic data for demo mode and load testing.
+
+Users are generated a chunk at a time as ``{column: array}`` batches that
+``UserStore.extend_columns`` appends directly, so no per-user dicts are
+built and at most one chunk of intermediate arrays is alive at once.  All
+randomness comes from a single seeded NumPy ``Generator``: the same
+``(seed, chunk_size)`` pair always yields the same data.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from payout_log import PAYOUT_STATUSES
+from user_store import (
+    OFAC_STATUSES,
+    PAYOUT_METHODS,
+    STATUSES,
+    TAX_ID_VERIFICATIONS,
+    UserStore,
+)
+
+FIRST_NAMES = ["John", "Jane", "Michael", "Sarah", "David", "Emma", "Chris", "Lisa", "Alex", "Maria", "James", "Anna", "Robert", "Emily", "Daniel", "Jessica", "Matthew", "Ashley", "Andrew", "Amanda"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez", "Wilson", "Anderson", "Taylor", "Thomas", "Hernandez", "Moore", "Martin", "Jackson", "Thompson", "White"]
+DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "company.com", "business.org"]
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+# Positions of the 32 hex digits inside a 36-character canonical UUID
+_UUID_HEX_SLOTS = np.array([i for i in range(36) if i not in (8, 13, 18, 23)])
+
+
+def random_uuids(rng, count):
+    """Generate count random (version 4) UUID strings in one batch"""
+    raw = rng.integers(0, 256, size=(count, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+
+    nibbles = np.empty((count, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0x0F
+
+    text = np.full((count, 36), ord("-"), dtype=np.uint8)
+    text[:, _UUID_HEX_SLOTS] = _HEX_DIGITS[nibbles]
+    return text.view("S36").ravel().astype("U36").astype(object)
+
+
+def _digits(prefix, values, width):
+    """Prefix fixed-width integers, e.g. ("415", 1234567, 7) -> "4151234567" """
+    text = np.char.zfill(values.astype(f"U{width}"), width)
+    return np.char.add(prefix, text).astype(object)
+
+
+def _lookup(table, codes):
+    return np.asarray(table, dtype=object)[codes]
+
+
+def _email_table():
+    """All first.last@domain combinations, indexed [first, last, domain]"""
+    first = np.char.lower(np.array(FIRST_NAMES))[:, None, None]
+    last = np.char.lower(np.array(LAST_NAMES))[None, :, None]
+    domain = np.array(DOMAINS)[None, None, :]
+    return np.char.add(np.char.add(np.char.add(first, "."), np.char.add(last, "@")), domain).astype(object)
+
+
+def generate_user_chunk(rng, count, now=None):
+    """Generate one {column: array} batch of count synthetic users"""
+    now = np.datetime64(now or datetime.now(), "s")
+    first = rng.integers(0, len(FIRST_NAMES), count)
+    last = rng.integers(0, len(LAST_NAMES), count)
+    domain = rng.integers(0, len(DOMAINS), count)
+    description_method = rng.integers(0, len(PAYOUT_METHODS), count)
+    bools = rng.integers(0, 2, size=(7, count)).astype(bool)
+    status = rng.integers(0, len(STATUSES), count, dtype=np.int8)
+    # Verified users have mostly passed KYC, so a realistic share of them is payout eligible
+    vetted = (status == STATUSES.index("verified")) & (rng.random(count) < 0.8)
+
+    return {
+        "id": random_uuids(rng, count),
+        "first_name": _lookup(FIRST_NAMES, first),
+        "last_name": _lookup(LAST_NAMES, last),
+        "email": _email_table()[first, last, domain],
+        "country_code": np.full(count, "1", dtype=object),
+        "phone_number": _digits("415", rng.integers(1_000_000, 10_000_000, count), 7),
+        "default_payout_method": rng.integers(0, len(PAYOUT_METHODS), count, dtype=np.int8),
+        "payout_details_id": random_uuids(rng, count),
+        "payout_platform": rng.integers(0, len(PAYOUT_METHODS), count, dtype=np.int8),
+        "payout_description": _lookup([f"{method.upper()} Account" for method in PAYOUT_METHODS], description_method),
+        "payout_mask": _digits("****", rng.integers(1000, 10_000, count), 4),
+        "payout_country": np.full(count, "US", dtype=object),
+        "payout_currency": np.full(count, "USD", dtype=object),
+        "wallet_amount": rng.integers(0, 10_001, count),
+        "wallet_withdrawable_amount": rng.integers(0, 8_001, count),
+        "wallet_credit_balance": rng.integers(0, 2_001, count),
+        "status": status,
+        "tax_id_collected": bools[0],
+        "tax_id_verification": np.where(
+            vetted, TAX_ID_VERIFICATIONS.index("verified"), rng.integers(0, len(TAX_ID_VERIFICATIONS), count)
+        ).astype(np.int8),
+        "address_collected": bools[1],
+        "date_of_birth_collected": bools[2],
+        "id_verified": bools[3] | vetted,
+        "flagged": bools[4] & ~vetted,
+        "ofac": bools[5],
+        "ofac_status": np.where(
+            vetted, OFAC_STATUSES.index("unflagged"), rng.integers(0, len(OFAC_STATUSES), count)
+        ).astype(np.int8),
+        "created_date": now - rng.integers(1, 366, count).astype("timedelta64[D]"),
+        "internal_id": _digits("user_", rng.integers(100_000, 1_000_000, count), 6),
+    }
+
+
+def iter_user_chunks(count, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream count synthetic users as column batches of at most chunk_size rows"""
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    for start in range(0, count, chunk_size):
+        yield generate_user_chunk(rng, min(chunk_size, count - start), now=now)
+
+
+def generate_users(count, seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate count synthetic users straight into a UserStore"""
+    store = UserStore(capacity=count)
+    for chunk in iter_user_chunks(count, seed=seed, chunk_size=chunk_size):
+        store.extend_columns(chunk)
+    return store
+
+
+def generate_payout_history(store, per_user=1.0, days=365, seed=None, now=None):
+    """Synthetic settled payouts over the last `days` days as PayoutLog.append arguments, oldest first.
+
+    Users are drawn from store rows with a payout method; about 4% of
+    payouts failed, the rest completed.
+    """
+    rng = np.random.default_rng(seed)
+    now = np.datetime64(now or datetime.now(), "s")
+    methods = store.column("default_payout_method")
+    candidates = np.flatnonzero(methods >= 0)
+    count = int(len(candidates) * per_user)
+    users = candidates[rng.integers(0, len(candidates), count)] if len(candidates) else np.zeros(0, dtype=np.intp)
+    times = np.sort(now - rng.integers(3600, days * 86_400, count).astype("timedelta64[s]"))
+    return {
+        "when": times,
+        "users": users,
+        "amounts": rng.integers(50, 5_001, count),
+        "methods": methods[users],
+        "status": np.where(
+            rng.random(count) < 0.04, PAYOUT_STATUSES.index("failed"), PAYOUT_STATUSES.index("completed")
+        ).astype(np.int8),
+        "ids": rng.integers(0, 16 ** 10, count),
+    }
+
+
+def iter_daily_signups(start="2024-01-01", end="2024-12-31", seed=None, chunk_days=365):
+    """Stream daily signup counts as DataFrames of at most chunk_days rows"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start=start, end=end, freq="D")
+    for offset in range(0, len(dates), chunk_days):
+        chunk = dates[offset:offset + chunk_days]
+        yield pd.DataFrame({
+            "date": chunk,
+            "signups": rng.integers(5, 51, len(chunk))
+        })
+
+
+def generate_analytics_data(start="2024-01-01", end="2024-12-31", seed=None):
+    """Daily signups, monthly revenue and payout-method distribution"""
+    rng = np.random.default_rng(seed)
+    daily_signups = pd.concat(
+        iter_daily_signups(start, end, seed=rng),
+        ignore_index=True
+    )
+
+    monthly_dates = pd.date_range(start=start, end=end, freq=pd.offsets.MonthEnd())
+    monthly_revenue = pd.DataFrame({
+        "month": monthly_dates,
+        "revenue": rng.integers(50_000, 200_001, len(monthly_dates))
+    })
+
+    payout_dist = pd.DataFrame({
+        "method": ["ACH", "PayPal", "Venmo", "Cash App", "International Bank"],
+        "count": rng.integers(100, 501, 5)
+    })
+
+    return daily_signups, monthly_revenue, payout_dist
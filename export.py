@@ -0,0 +1,158 @@
+"""Chunked CSV and Parquet export of users from the columnar store.
+
+Rows are selected by store row index and converted ``chunk_size`` rows at
+a time, so peak memory is bounded by one chunk no matter how many users
+are exported.  Nested fields (``wallet``, ``compliance``,
+``default_payout_method_details``...) are flattened into dotted column
+names.
+"""
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from user_store import CATEGORICAL_COLUMNS
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Export column -> store column, in output order
+EXPORT_FIELDS = {
+    "id": "id",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "email": "email",
+    "phone_number.country_code": "country_code",
+    "phone_number.phone_number": "phone_number",
+    "status": "status",
+    "default_payout_method": "default_payout_method",
+    "default_payout_method_details.id": "payout_details_id",
+    "default_payout_method_details.platform": "payout_platform",
+    "default_payout_method_details.description": "payout_description",
+    "default_payout_method_details.mask": "payout_mask",
+    "default_payout_method_details.country": "payout_country",
+    "default_payout_method_details.currency": "payout_currency",
+    "wallet.amount": "wallet_amount",
+    "wallet.withdrawable_amount": "wallet_withdrawable_amount",
+    "wallet.credit_balance": "wallet_credit_balance",
+    "compliance.tax_id_collected": "tax_id_collected",
+    "compliance.tax_id_verification": "tax_id_verification",
+    "compliance.address_collected": "address_collected",
+    "compliance.date_of_birth_collected": "date_of_birth_collected",
+    "compliance.id_verified": "id_verified",
+    "compliance.flagged": "flagged",
+    "compliance.flags.ofac": "ofac",
+    "compliance.flags.ofac_status": "ofac_status",
+    "created_date": "created_date",
+    "metadata.internal_id": "internal_id",
+    "metadata": "metadata",
+}
+
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def iter_frames(store, rows=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield flattened DataFrames of at most chunk_size users"""
+    rows = np.arange(len(store)) if rows is None else np.asarray(rows, dtype=np.intp)
+    if not len(rows):
+        yield pd.DataFrame(columns=list(EXPORT_FIELDS))
+        return
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        data = {}
+        for name, column in EXPORT_FIELDS.items():
+            if column in CATEGORICAL_COLUMNS:
+                data[name] = store.decoded(column, chunk)
+            elif column == "metadata":
+                data[name] = [json.dumps(value) if value else None for value in store.column(column)[chunk]]
+            else:
+                data[name] = store.column(column)[chunk]
+        yield pd.DataFrame(data, columns=list(EXPORT_FIELDS))
+
+
+def iter_csv(store, rows=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield UTF-8 CSV bytes chunk by chunk (header in the first chunk)"""
+    header = True
+    for frame in iter_frames(store, rows, chunk_size):
+        yield frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose buffered bytes can be drained between row groups"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_supported():
+    """Whether Parquet export is available (pyarrow is installed)"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def iter_parquet(store, rows=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield Parquet file bytes, one row group per chunk (requires pyarrow)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+
+    sink = _Drain()
+    writer = None
+    try:
+        for frame in iter_frames(store, rows, chunk_size):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def write_export(stream, fileobj):
+    """Copy an export byte stream into a file object; returns bytes written"""
+    written = 0
+    for chunk in stream:
+        fileobj.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def export_file(stream, suffix=None):
+    """Spool an export byte stream to an anonymous temporary file; returns it rewound, read-only.
+
+    The file has no name on disk and disappears once closed, including when
+    the stream fails part way through.  It is returned as a plain
+    ``io.BufferedReader``, one of the file types ``st.download_button``
+    accepts from a data callable.
+    """
+    with tempfile.TemporaryFile(suffix=suffix) as fileobj:
+        write_export(stream, fileobj)
+        fileobj.flush()
+        # A second descriptor keeps the unnamed file alive after the writer closes
+        reader = open(os.dup(fileobj.fileno()), "rb")
+    reader.seek(0)
+    return reader
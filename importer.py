@@ -0,0 +1,243 @@
+"""Streaming bulk import of users from CSV or JSONL.
+
+Files are read ``chunk_size`` records at a time and each chunk is
+validated as a whole with vectorized pandas string operations.  Chunks are
+validated in parallel on a process pool with a bounded number in flight,
+so memory stays proportional to a few chunks however large the file is.
+Valid rows are handed to ``insert`` (``UserDatabase.insert_new_users``) in
+batches; invalid rows, including lines that cannot be parsed at all and ids
+that turn out to be stored already, are reported individually with the
+field and reason.
+
+Columns use the same dotted names as the export (``phone_number.country_code``,
+``wallet.amount``...), so an exported file imports unchanged.  JSONL
+records may be nested instead; they are flattened with the same names.
+"""
+
+import io
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from user_store import COUNTRY_CODES, PAYOUT_METHODS, STATUSES, nest_record
+
+DEFAULT_CHUNK_SIZE = 10_000
+MAX_REPORTED_ERRORS = 1_000
+
+# Import column -> store column; other columns in the file are ignored
+IMPORT_FIELDS = {
+    "id": "id",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "email": "email",
+    "phone_number.country_code": "country_code",
+    "phone_number.phone_number": "phone_number",
+    "status": "status",
+    "default_payout_method": "default_payout_method",
+    "wallet.amount": "wallet_amount",
+    "wallet.withdrawable_amount": "wallet_withdrawable_amount",
+    "wallet.credit_balance": "wallet_credit_balance",
+    "created_date": "created_date",
+}
+
+# Store columns the import format has no column for; nest_record would leave them None
+IMPORT_DEFAULTS = {"tax_id_verification": "unsubmitted", "ofac_status": "unflagged"}
+
+REQUIRED_FIELDS = ("first_name", "last_name", "email", "phone_number.country_code", "phone_number.phone_number")
+WALLET_FIELDS = ("wallet.amount", "wallet.withdrawable_amount", "wallet.credit_balance")
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+PHONE_PATTERN = r"^\d{4,15}$"
+# Up to 18 digits always fits the store's int64 wallet columns
+WALLET_PATTERN = r"\d{0,18}"
+
+# Chunk column carrying why a line could not be parsed ("" when it parsed)
+PARSE_ERROR = "_parse_error"
+# Stands in for the fields of a CSV line with too many of them
+_BAD_LINE = "\x00bad line"
+
+
+@dataclass
+class RowError:
+    row: int
+    field: str
+    message: str
+
+
+@dataclass
+class ImportReport:
+    total: int = 0
+    imported: int = 0
+    invalid: int = 0
+    errors: list = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float = None
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self):
+        """Records processed per second"""
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def errors_frame(self):
+        return pd.DataFrame({
+            "Row": [error.row for error in self.errors],
+            "Field": [error.field for error in self.errors],
+            "Error": [error.message for error in self.errors]
+        })
+
+
+def iter_chunks(fileobj, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size records with string values.
+
+    A line that cannot be parsed still takes its place in the chunk, with
+    the reason in its PARSE_ERROR column, so row numbers stay aligned with
+    the file.
+    """
+    if fmt == "csv":
+        # The python engine hands over-long lines to on_bad_lines instead of failing the read
+        chunks = pd.read_csv(
+            fileobj, dtype=str, keep_default_na=False, chunksize=chunk_size,
+            engine="python", on_bad_lines=lambda fields: [_BAD_LINE]
+        )
+        for chunk in chunks:
+            bad = chunk.iloc[:, 0] == _BAD_LINE
+            chunk[PARSE_ERROR] = np.where(bad, "malformed CSV line: too many fields", "")
+            yield chunk
+    elif fmt == "jsonl":
+        lines = io.TextIOWrapper(fileobj, encoding="utf-8") if isinstance(fileobj.read(0), bytes) else fileobj
+        lines = (line for line in lines if line.strip())
+        while batch := list(islice(lines, chunk_size)):
+            yield pd.DataFrame([_parse_json_line(line) for line in batch], dtype=str).fillna("")
+    else:
+        raise ValueError(f"unknown import format {fmt!r}; expected 'csv' or 'jsonl'")
+
+
+def _parse_json_line(line):
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as exc:
+        return {PARSE_ERROR: f"invalid JSON: {exc.msg}"}
+    if not isinstance(record, dict):
+        return {PARSE_ERROR: "line is not a JSON object"}
+    return _flatten(record)
+
+
+def _flatten(record, prefix=""):
+    """Nested JSON object -> {dotted name: string value}"""
+    flat = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[prefix + key] = "" if value is None else str(value)
+    return flat
+
+
+def validate_chunk(frame, first_row=1):
+    """Validate one chunk; returns (file rows of valid records, flat records, [RowError])"""
+    parse_errors = frame[PARSE_ERROR].fillna("") if PARSE_ERROR in frame else pd.Series("", index=frame.index)
+    frame = frame.reindex(columns=list(IMPORT_FIELDS), fill_value="").fillna("")
+    frame = frame.apply(lambda column: column.str.strip())
+    errors = []
+    invalid = np.zeros(len(frame), dtype=bool)
+
+    def reject(mask, name, message):
+        mask = np.asarray(mask, dtype=bool) & ~invalid
+        errors.extend(RowError(first_row + int(i), name, message) for i in np.flatnonzero(mask))
+        invalid[mask] = True
+
+    for message in parse_errors.unique():
+        if message:
+            reject(parse_errors == message, "line", message)
+    for name in REQUIRED_FIELDS:
+        reject(frame[name] == "", name, "required")
+    reject(~frame["email"].str.fullmatch(EMAIL_PATTERN), "email", "invalid email address")
+    reject(~frame["phone_number.phone_number"].str.fullmatch(PHONE_PATTERN), "phone_number.phone_number",
+           "phone number must be 4-15 digits")
+    reject(~frame["phone_number.country_code"].isin(COUNTRY_CODES), "phone_number.country_code",
+           f"country code must be one of {', '.join(COUNTRY_CODES)}")
+    method = frame["default_payout_method"].str.lower()
+    reject(~method.isin(("", *PAYOUT_METHODS)), "default_payout_method",
+           f"payout method must be one of {', '.join(PAYOUT_METHODS)}")
+    status = frame["status"].str.lower()
+    reject(~status.isin(("", *STATUSES)), "status", f"status must be one of {', '.join(STATUSES)}")
+    for name in WALLET_FIELDS:
+        reject(~frame[name].str.fullmatch(WALLET_PATTERN), name, "must be a non-negative whole number of at most 18 digits")
+    created = pd.to_datetime(frame["created_date"].where(frame["created_date"] != ""), errors="coerce", format="mixed")
+    reject(created.isna() & (frame["created_date"] != ""), "created_date", "invalid date")
+
+    valid = frame[~invalid].copy()
+    valid["default_payout_method"] = method[~invalid].replace("", PAYOUT_METHODS[0])
+    valid["status"] = status[~invalid].replace("", "unverified")
+    for name in WALLET_FIELDS:
+        valid[name] = pd.to_numeric(valid[name].replace("", "0")).astype(np.int64)
+    now = datetime.now().isoformat(timespec="seconds")
+    valid["created_date"] = [
+        value.isoformat(timespec="seconds") if not pd.isna(value) else now for value in created[~invalid]
+    ]
+    records = valid.rename(columns=IMPORT_FIELDS).assign(**IMPORT_DEFAULTS).to_dict("records")
+    return (first_row + np.flatnonzero(~invalid)).tolist(), records, errors
+
+
+def import_users(fileobj, fmt, insert, exists=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 workers=None, on_progress=None, max_errors=MAX_REPORTED_ERRORS):
+    """Stream, validate and insert users from fileobj; returns an ImportReport.
+
+    ``insert`` receives lists of nested user dicts and returns the ids it
+    skipped because they are already stored; ``exists(user_id)`` rejects
+    ids that are already known before that.  Ids missing from the file are
+    generated.  ``on_progress(report)`` is called after every chunk.
+    """
+    report = ImportReport()
+    seen_ids = set()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        first_row = 1
+
+        def drain(block):
+            # Results are consumed in file order so inserts keep the file's row order
+            while pending and (block or pending[0].done()):
+                rows, records, errors = pending.pop(0).result()
+                users = {}
+                for row, record in zip(rows, records):
+                    if not record["id"]:
+                        record["id"] = str(uuid.uuid4())
+                    elif record["id"] in seen_ids or (exists is not None and exists(record["id"])):
+                        errors.append(RowError(row, "id", "duplicate user id"))
+                        continue
+                    seen_ids.add(record["id"])
+                    users[record["id"]] = (row, nest_record(record))
+                if users:
+                    skipped = insert([user for _, user in users.values()])
+                    errors.extend(RowError(users[user_id][0], "id", "duplicate user id") for user_id in skipped)
+                    report.imported += len(users) - len(skipped)
+                report.invalid += len(errors)
+                report.errors.extend(errors[:max(0, max_errors - len(report.errors))])
+                if on_progress:
+                    on_progress(report)
+
+        for chunk in iter_chunks(fileobj, fmt, chunk_size):
+            report.total += len(chunk)
+            pending.append(executor.submit(validate_chunk, chunk, first_row))
+            first_row += len(chunk)
+            # At most two chunks per worker are parsed but not yet inserted
+            drain(block=len(pending) >= 2 * workers)
+        drain(block=True)
+
+    report.errors.sort(key=lambda error: error.row)
+    report.finished_at = time.monotonic()
+    return report
+
@@ -0,0 +1,178 @@
+"""Append-only wallet ledger with incrementally materialized balances.
+
+Every change to a wallet is an entry: opening balances, credits, debits
+and payouts.  Entries live in preallocated NumPy columns (time, user row,
+kind and one signed delta per balance column), so the ledger costs a few
+dozen bytes per entry and is only ever appended to.  Current per-user
+balances and global totals are updated as entries are appended, so
+reading them never replays anything.
+
+Point-in-time queries replay only the tail of the ledger: a snapshot of
+all balances is taken every ``snapshot_every`` entries, and a query starts
+from the latest snapshot at or before the requested time.
+"""
+
+import bisect
+import copy
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Store columns materialized from the ledger, in delta-column order
+BALANCE_COLUMNS = ("wallet_amount", "wallet_withdrawable_amount", "wallet_credit_balance")
+
+ENTRY_KINDS = ("opening", "credit", "debit", "payout")
+
+# Sign applied to an entry's amount for each balance column
+KIND_EFFECTS = {
+    "credit": (1, 1, 0),
+    "debit": (-1, -1, 0),
+    "payout": (-1, -1, 0),
+}
+
+DEFAULT_SNAPSHOT_EVERY = 100_000
+
+
+def _seconds(when):
+    return np.asarray(when, dtype="datetime64[s]").astype(np.int64)
+
+
+@dataclass
+class Snapshot:
+    seq: int
+    balances: np.ndarray
+    totals: np.ndarray
+
+
+class WalletLedger:
+    """Wallet entries for every user, with live balances and periodic snapshots"""
+
+    def __init__(self, snapshot_every=DEFAULT_SNAPSHOT_EVERY, capacity=1024):
+        self.snapshot_every = snapshot_every
+        self._size = 0
+        self._times = np.zeros(capacity, dtype=np.int64)
+        self._rows = np.zeros(capacity, dtype=np.int32)
+        self._kinds = np.zeros(capacity, dtype=np.int8)
+        self._deltas = np.zeros((capacity, len(BALANCE_COLUMNS)), dtype=np.int64)
+        self.balances = np.zeros((0, len(BALANCE_COLUMNS)), dtype=np.int64)
+        self.totals = np.zeros(len(BALANCE_COLUMNS), dtype=np.int64)
+        self.snapshots = [Snapshot(0, self.balances.copy(), self.totals.copy())]
+
+    @classmethod
+    def from_store(cls, store, snapshot_every=DEFAULT_SNAPSHOT_EVERY):
+        """Open every store row at its created date with its current balances"""
+        ledger = cls(snapshot_every=snapshot_every, capacity=max(1024, len(store)))
+        created = store.column("created_date")
+        created = np.where(np.isnat(created), np.datetime64("now", "s"), created)
+        rows = np.argsort(created, kind="stable")
+        balances = np.column_stack([store.column(name)[rows] for name in BALANCE_COLUMNS])
+        ledger.open_accounts(rows, balances, created[rows])
+        return ledger
+
+    def __len__(self):
+        return self._size
+
+    def fork(self):
+        """Copy-on-write copy: balances are copied, entries are shared.
+
+        New entries are appended past the end of the shared entry arrays,
+        which the ledger forked from never reads; only fork a ledger that
+        is no longer written to.
+        """
+        ledger = copy.copy(self)
+        ledger.balances = self.balances.copy()
+        ledger.totals = self.totals.copy()
+        ledger.snapshots = list(self.snapshots)
+        return ledger
+
+    def open_accounts(self, rows, balances, when):
+        """Post opening entries setting each row's balances (one column per BALANCE_COLUMNS)"""
+        balances = np.asarray(balances, dtype=np.int64).reshape(-1, len(BALANCE_COLUMNS))
+        self._append(rows, "opening", balances, when)
+
+    def post(self, rows, kind, amounts, when):
+        """Post credits, debits or payouts of amounts (positive) for rows"""
+        if kind not in KIND_EFFECTS:
+            raise ValueError(f"unknown entry kind {kind!r}; expected one of {tuple(KIND_EFFECTS)}")
+        amounts = np.asarray(amounts, dtype=np.int64).reshape(-1, 1)
+        if (amounts < 0).any():
+            raise ValueError("ledger amounts must be positive; use the entry kind for the sign")
+        self._append(rows, kind, amounts * np.array(KIND_EFFECTS[kind], dtype=np.int64), when)
+
+    def _append(self, rows, kind, deltas, when):
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        if not len(rows):
+            return
+        times = np.broadcast_to(_seconds(when), rows.shape)
+        last = self._times[self._size - 1] if self._size else np.iinfo(np.int64).min
+        if times[0] < last or (np.diff(times) < 0).any():
+            raise ValueError("ledger entries must be appended in time order")
+
+        end = self._size + len(rows)
+        self._reserve(end)
+        self._times[self._size:end] = times
+        self._rows[self._size:end] = rows
+        self._kinds[self._size:end] = ENTRY_KINDS.index(kind)
+        self._deltas[self._size:end] = deltas
+        self._size = end
+
+        if rows.max() >= len(self.balances):
+            grown = np.zeros((max(rows.max() + 1, 2 * len(self.balances)), len(BALANCE_COLUMNS)), dtype=np.int64)
+            grown[:len(self.balances)] = self.balances
+            self.balances = grown
+        np.add.at(self.balances, rows, deltas)
+        self.totals += deltas.sum(axis=0)
+
+        if self._size - self.snapshots[-1].seq >= self.snapshot_every:
+            self.snapshots.append(Snapshot(self._size, self.balances.copy(), self.totals.copy()))
+
+    def _reserve(self, size):
+        capacity = len(self._times)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name in ("_times", "_rows", "_kinds", "_deltas"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def balance(self, row):
+        """Current balances of one row as {store column: value}"""
+        values = self.balances[row] if row < len(self.balances) else np.zeros_like(self.totals)
+        return dict(zip(BALANCE_COLUMNS, values.tolist()))
+
+    def total(self, column):
+        return int(self.totals[BALANCE_COLUMNS.index(column)])
+
+    def _replay_from(self, when):
+        """(snapshot, end) where entries snapshot.seq..end are the replay tail up to when"""
+        end = int(np.searchsorted(self._times[:self._size], _seconds(when), side="right"))
+        snapshot = self.snapshots[bisect.bisect_right([s.seq for s in self.snapshots], end) - 1]
+        return snapshot, end
+
+    def balance_at(self, row, when):
+        """Balances of one row as of a point in time"""
+        snapshot, end = self._replay_from(when)
+        values = snapshot.balances[row].copy() if row < len(snapshot.balances) else np.zeros_like(self.totals)
+        tail = slice(snapshot.seq, end)
+        values += self._deltas[tail][self._rows[tail] == row].sum(axis=0)
+        return dict(zip(BALANCE_COLUMNS, values.tolist()))
+
+    def totals_at(self, when):
+        """Global balance totals as of a point in time"""
+        snapshot, end = self._replay_from(when)
+        values = snapshot.totals + self._deltas[snapshot.seq:end].sum(axis=0)
+        return dict(zip(BALANCE_COLUMNS, values.tolist()))
+
+    def history(self, row, limit=None):
+        """DataFrame of one row's entries, newest first"""
+        entries = np.flatnonzero(self._rows[:self._size] == row)[::-1][:limit]
+        history = pd.DataFrame({
+            "date": self._times[entries].astype("datetime64[s]"),
+            "kind": np.array(ENTRY_KINDS, dtype=object)[self._kinds[entries]]
+        })
+        for i, column in enumerate(BALANCE_COLUMNS):
+            history[column] = self._deltas[entries, i]
+        return history
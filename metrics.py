@@ -0,0 +1,125 @@
+"""Headline dashboard metrics, computed off the request path.
+
+The sidebar Quick Stats and the Analytics and Payouts metric cards read a
+``DashboardMetrics`` snapshot instead of querying the rollups, ledger and
+payout log on every rerun.  A ``MetricsRefresher`` thread recomputes the
+snapshot every ``interval`` seconds, or as soon as it is notified that the
+data changed, and publishes it by swapping a single reference, so readers
+never block and never see a half-built snapshot.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+DEFAULT_REFRESH_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class DashboardMetrics:
+    computed_at: float
+    # Version of the data the metrics were computed from
+    data_version: int
+    total_users: int
+    new_users_week: int
+    verified_users: int
+    verification_rate: float
+    total_wallet_value: int
+    avg_wallet: float
+    avg_wallet_week_ago: float
+    total_payouts: int
+    open_payouts: int
+    completed_today: int
+    completed_amount: int
+
+    @property
+    def age(self):
+        """Seconds since the metrics were computed"""
+        return max(0.0, time.time() - self.computed_at)
+
+
+def compute_metrics(data, data_version=0, now=None):
+    """Headline metrics from a dataset's components"""
+    now = now or datetime.now()
+    rollups, ledger, payout_log = data["rollups"], data["ledger"], data["payout_log"]
+    today = np.datetime64(now, "D")
+    week = [(today - offset).item() for offset in range(7)]
+    new_users_week = sum(rollups.signups["day"].get(day, 0) for day in week)
+
+    total_wallet_value = ledger.total("wallet_amount")
+    users_week_ago = rollups.total_users - new_users_week
+    wallet_week_ago = ledger.totals_at(now - timedelta(days=7))["wallet_amount"]
+    return DashboardMetrics(
+        computed_at=time.time(),
+        data_version=data_version,
+        total_users=rollups.total_users,
+        new_users_week=new_users_week,
+        verified_users=rollups.count_status("verified"),
+        verification_rate=rollups.verification_rate,
+        total_wallet_value=total_wallet_value,
+        avg_wallet=total_wallet_value / rollups.total_users if rollups.total_users else 0.0,
+        avg_wallet_week_ago=wallet_week_ago / users_week_ago if users_week_ago else 0.0,
+        total_payouts=payout_log.count(),
+        open_payouts=payout_log.count("pending") + payout_log.count("processing"),
+        completed_today=payout_log.completed_on(now),
+        completed_amount=payout_log.completed_amount,
+    )
+
+
+class MetricsRefresher:
+    """Background thread keeping an up-to-date DashboardMetrics for a shared dataset.
+
+    ``source()`` returns ``(components, version)`` for the data to
+    summarize; the components must not change once returned (a published
+    snapshot).  It returns None once the data is gone, which stops the
+    thread.  The first snapshot is computed in the constructor so readers
+    always have one.
+    """
+
+    def __init__(self, source, interval=DEFAULT_REFRESH_INTERVAL):
+        self.source = source
+        self.interval = interval
+        self.failures = 0
+        self._changed = threading.Event()
+        self._stopped = threading.Event()
+        self._snapshot = self._compute()
+        self._thread = threading.Thread(target=self._run, name="metrics-refresher", daemon=True)
+        self._thread.start()
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def notify(self):
+        """Recompute now instead of waiting for the next scheduled refresh"""
+        self._changed.set()
+
+    def _compute(self):
+        source = self.source()
+        if source is None:
+            return None
+        components, version = source
+        return compute_metrics(components, data_version=version)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._changed.wait(self.interval)
+            self._changed.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                snapshot = self._compute()
+            except Exception:
+                # Keep serving the last good snapshot; its age shows it is stale
+                self.failures += 1
+                continue
+            if snapshot is None:
+                break
+            self._snapshot = snapshot
+
+    def stop(self):
+        self._stopped.set()
+        self._changed.set()
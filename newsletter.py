@@ -0,0 +1,294 @@
+"""Newsletter dispatch for the Users tab's "Send Newsletter" bulk action.
+
+Recipients are split into batches and sent from a background thread pool,
+so the Streamlit script only polls a live ``DispatchProgress``.  Each
+worker reuses one SMTP connection from a small pool for many messages, a
+token bucket caps the overall send rate, and a batch that loses its
+connection is retried (on a fresh connection) with exponential backoff.
+
+``LocalSMTPServer`` is a minimal in-process SMTP stand-in that accepts
+and counts messages, used in demo mode and for exercising the pipeline
+without a real mail server.
+"""
+
+import queue
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+
+DEFAULT_SENDER = "newsletter@dragonpayout.example"
+
+# Placeholders a message body may use
+TEMPLATE_FIELDS = ("first_name",)
+
+
+def check_template(body):
+    """Raise ValueError unless body formats with just the TEMPLATE_FIELDS placeholders"""
+    try:
+        body.format(**dict.fromkeys(TEMPLATE_FIELDS, ""))
+    except KeyError as exc:
+        raise ValueError(
+            f"Unknown placeholder {{{exc.args[0]}}}; use {{first_name}}, or double the braces for literal text"
+        ) from None
+    except (IndexError, ValueError, AttributeError) as exc:
+        raise ValueError(f"Invalid message template: {exc}; double any literal braces") from None
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` messages per second"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate / 10)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SMTPConnectionPool:
+    """Reusable SMTP connections, opened lazily up to `size`"""
+
+    def __init__(self, host, port, size=4, username=None, password=None, starttls=False, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.size = size
+        self._pool = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(None)
+
+    def _connect(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        return conn
+
+    def acquire(self):
+        return self._pool.get() or self._connect()
+
+    def release(self, conn, broken=False):
+        if broken and conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+            conn = None
+        self._pool.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            if conn is not None:
+                try:
+                    conn.quit()
+                except (smtplib.SMTPException, OSError):
+                    pass
+
+
+@dataclass
+class DispatchProgress:
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float = None
+    cancelled: bool = False
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self):
+        """Messages sent per second"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fraction(self):
+        return (self.sent + self.failed) / self.total if self.total else 1.0
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class NewsletterDispatcher:
+    """Sends personalized messages in batches over pooled SMTP connections"""
+
+    def __init__(self, connections, batch_size=100, rate_limit=200, max_retries=3,
+                 backoff=0.5, sender=DEFAULT_SENDER):
+        self.connections = connections
+        self.batch_size = batch_size
+        self.limiter = RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sender = sender
+        # One worker per pooled connection caps concurrent SMTP sessions
+        self._executor = ThreadPoolExecutor(max_workers=connections.size, thread_name_prefix="newsletter")
+        self._lock = threading.Lock()
+
+    def submit(self, recipients, subject, body):
+        """Start sending in the background; returns a live DispatchProgress.
+
+        recipients is a sequence of (email, first_name); body may use
+        ``{first_name}``.  Raises ValueError if body is not a valid template,
+        before anything is sent.
+        """
+        check_template(body)
+        progress = DispatchProgress(total=len(recipients))
+        batches = [recipients[i:i + self.batch_size] for i in range(0, len(recipients), self.batch_size)]
+        if not batches:
+            progress.finished_at = time.monotonic()
+            return progress
+
+        remaining = [len(batches)]
+
+        def _on_done(_future):
+            with self._lock:
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    progress.finished_at = time.monotonic()
+
+        for batch in batches:
+            self._executor.submit(self._run_batch, batch, subject, body, progress).add_done_callback(_on_done)
+        return progress
+
+    def _message(self, email, first_name, subject, body):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = email
+        message["Subject"] = subject
+        message.set_content(body.format(first_name=first_name))
+        return message
+
+    def _run_batch(self, batch, subject, body, progress):
+        pending = list(batch)
+        try:
+            for attempt in range(self.max_retries + 1):
+                if progress.cancelled:
+                    break
+                conn = None
+                try:
+                    conn = self.connections.acquire()
+                    while pending and not progress.cancelled:
+                        email, first_name = pending[0]
+                        self.limiter.acquire()
+                        try:
+                            conn.send_message(self._message(email, first_name, subject, body))
+                            sent = True
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError):
+                            sent = False
+                        pending.pop(0)
+                        with self._lock:
+                            if sent:
+                                progress.sent += 1
+                            else:
+                                progress.failed += 1
+                    self.connections.release(conn)
+                    break
+                except OSError:
+                    # Connection-level failure (SMTPException subclasses OSError);
+                    # per-recipient refusals were handled above
+                    self.connections.release(conn, broken=True)
+                    if attempt == self.max_retries:
+                        break
+                    with self._lock:
+                        progress.retries += 1
+                    time.sleep(self.backoff * 2 ** attempt)
+                except Exception:
+                    # Not worth retrying; the rest of the batch is counted as failed below
+                    self.connections.release(conn, broken=True)
+                    break
+        finally:
+            if pending and not progress.cancelled:
+                with self._lock:
+                    progress.failed += len(pending)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.connections.close()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 localhost Dragon Payout SMTP stand-in")
+        while line := self.rfile.readline():
+            command = line.decode(errors="replace").strip().split(" ", 1)[0].upper()
+            if command in ("HELO", "EHLO"):
+                self.reply("250 localhost")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while (data := self.rfile.readline()) and data.rstrip(b"\r\n") != b".":
+                    pass
+                self.server.count_message()
+                self.reply("250 OK: queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """In-process SMTP stand-in that accepts and counts every message"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _SMTPHandler)
+        self.received = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, name="smtp-stand-in", daemon=True)
+        self._thread.start()
+
+    @property
+    def host(self):
+        return self.server_address[0]
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count_message(self):
+        with self._lock:
+            self.received += 1
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
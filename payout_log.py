@@ -0,0 +1,231 @@
+"""Time-indexed payout event store for the Payouts tab.
+
+Every payout is one row in preallocated NumPy columns (payout id, time,
+user row, amount, method, status), appended in time order so a date range
+is a binary search.  Each row also links to the same user's previous
+payout, giving a per-user chain that lists a user's payouts without
+scanning the log.  Payouts still in flight (pending or processing) are
+tracked in a small set, so the processing queue never scans history.
+
+The Payouts tab headline metrics (payouts per status, settled amount and
+completions per day) are running counters updated on append and on each
+status change, so they cost nothing to read however long the log gets.
+"""
+
+import copy
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from user_store import PAYOUT_METHODS
+
+PAYOUT_STATUSES = ("pending", "processing", "completed", "failed")
+OPEN_STATUSES = ("pending", "processing")
+
+# Rows examined per step when scanning backwards for filtered "last N" queries
+SCAN_BLOCK = 4096
+
+
+def _seconds(when):
+    return np.asarray(when, dtype="datetime64[s]").astype(np.int64)
+
+
+def _codes(values, vocabulary):
+    """Names (or codes) -> int8 codes into vocabulary"""
+    values = np.atleast_1d(np.asarray(values))
+    if values.dtype.kind not in "OU":
+        return values.astype(np.int8)
+    names, inverse = np.unique(values, return_inverse=True)
+    return np.array([vocabulary.index(name) for name in names.tolist()], dtype=np.int8)[inverse]
+
+
+def format_payout_id(number):
+    return f"PO-{number:010X}"
+
+
+class PayoutLog:
+    """Append-only payouts with time, status and per-user indexes"""
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._times = np.zeros(capacity, dtype=np.int64)
+        self._users = np.zeros(capacity, dtype=np.int32)
+        self._amounts = np.zeros(capacity, dtype=np.int64)
+        self._methods = np.zeros(capacity, dtype=np.int8)
+        self._statuses = np.zeros(capacity, dtype=np.int8)
+        self._previous = np.zeros(capacity, dtype=np.int32)
+        self._latest_by_user = np.full(0, -1, dtype=np.int32)
+        self._open = set()
+        self.status_counts = np.zeros(len(PAYOUT_STATUSES), dtype=np.int64)
+        self.completed_amount = 0
+        self.completed_by_day = Counter()
+
+    def __len__(self):
+        return self._size
+
+    def fork(self):
+        """Copy-on-write copy: state changed in place is copied, append-only columns are shared.
+
+        Only fork a log that is no longer written to: the fork appends past
+        the end of the shared columns.
+        """
+        log = copy.copy(self)
+        log._statuses = self._statuses.copy()
+        log._latest_by_user = self._latest_by_user.copy()
+        log._open = set(self._open)
+        log.status_counts = self.status_counts.copy()
+        log.completed_by_day = Counter(self.completed_by_day)
+        return log
+
+    def append(self, when, users, amounts, methods, status="pending", ids=None):
+        """Append payouts (methods as names or codes); returns their rows"""
+        users = np.atleast_1d(np.asarray(users, dtype=np.int64))
+        count = len(users)
+        if not count:
+            return np.arange(0)
+        times = np.broadcast_to(_seconds(when), users.shape)
+        last = self._times[self._size - 1] if self._size else np.iinfo(np.int64).min
+        if times[0] < last or (np.diff(times) < 0).any():
+            raise ValueError("payouts must be appended in time order")
+        methods = _codes(methods, PAYOUT_METHODS)
+        statuses = np.broadcast_to(_codes(status, PAYOUT_STATUSES), users.shape)
+        if ids is None:
+            ids = np.random.default_rng().integers(0, 16 ** 10, count)
+
+        rows = np.arange(self._size, self._size + count)
+        self._reserve(self._size + count)
+        self._ids[rows] = ids
+        self._times[rows] = times
+        self._users[rows] = users
+        self._amounts[rows] = amounts
+        self._methods[rows] = methods
+        self._statuses[rows] = statuses
+        self._link(rows, users)
+        self._size += count
+
+        self.status_counts += np.bincount(statuses, minlength=len(PAYOUT_STATUSES))
+        for name in OPEN_STATUSES:
+            self._open.update(rows[statuses == PAYOUT_STATUSES.index(name)].tolist())
+        completed = statuses == PAYOUT_STATUSES.index("completed")
+        self._count_completed(rows[completed], times[completed])
+        return rows
+
+    def _link(self, rows, users):
+        """Point each new row at the same user's previous payout"""
+        if users.max() >= len(self._latest_by_user):
+            grown = np.full(max(users.max() + 1, 2 * len(self._latest_by_user)), -1, dtype=np.int32)
+            grown[:len(self._latest_by_user)] = self._latest_by_user
+            self._latest_by_user = grown
+        order = np.argsort(users, kind="stable")
+        sorted_users, sorted_rows = users[order], rows[order]
+        first = np.r_[True, sorted_users[1:] != sorted_users[:-1]]
+        last = np.r_[sorted_users[1:] != sorted_users[:-1], True]
+        previous = np.roll(sorted_rows, 1)
+        previous[first] = self._latest_by_user[sorted_users[first]]
+        self._previous[sorted_rows] = previous
+        self._latest_by_user[sorted_users[last]] = sorted_rows[last]
+
+    def _reserve(self, size):
+        capacity = len(self._times)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name in ("_ids", "_times", "_users", "_amounts", "_methods", "_statuses", "_previous"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _count_completed(self, rows, times):
+        if not len(rows):
+            return
+        self.completed_amount += int(self._amounts[rows].sum())
+        days = np.asarray(times) // 86_400
+        first = int(days.min())
+        counts = np.bincount(days - first)
+        self.completed_by_day.update({
+            (np.datetime64(first + offset, "D")).item(): int(count) for offset, count in zip(np.flatnonzero(counts).tolist(), counts[counts > 0])
+        })
+
+    def set_status(self, rows, status, when):
+        """Move in-flight payouts to a new status (completions are counted on `when`'s day)"""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        if not len(rows):
+            return
+        closed = [row for row in rows.tolist() if row not in self._open]
+        if closed:
+            raise ValueError(f"payouts {[format_payout_id(self._ids[row]) for row in closed[:5]]} are already settled")
+        code = PAYOUT_STATUSES.index(status)
+        self.status_counts -= np.bincount(self._statuses[rows], minlength=len(PAYOUT_STATUSES))
+        self.status_counts[code] += len(rows)
+        self._statuses[rows] = code
+        if status not in OPEN_STATUSES:
+            self._open.difference_update(rows.tolist())
+        if status == "completed":
+            self._count_completed(rows, np.broadcast_to(_seconds(when), rows.shape))
+
+    def count(self, status=None):
+        if status is None:
+            return self._size
+        return int(self.status_counts[PAYOUT_STATUSES.index(status)])
+
+    def completed_on(self, day):
+        return self.completed_by_day.get(np.datetime64(day, "D").item(), 0)
+
+    def open_rows(self, status="pending"):
+        """Rows currently in an in-flight status, oldest first"""
+        code = PAYOUT_STATUSES.index(status)
+        return np.array(sorted(row for row in self._open if self._statuses[row] == code), dtype=np.intp)
+
+    def _bounds(self, start=None, end=None):
+        times = self._times[:self._size]
+        lo = 0 if start is None else int(np.searchsorted(times, _seconds(start), side="left"))
+        hi = self._size if end is None else int(np.searchsorted(times, _seconds(end), side="right"))
+        return lo, hi
+
+    def counts(self, start=None, end=None):
+        """{status: payouts} created between start and end (running counters when unbounded)"""
+        if start is None and end is None:
+            counts = self.status_counts
+        else:
+            lo, hi = self._bounds(start, end)
+            counts = np.bincount(self._statuses[lo:hi], minlength=len(PAYOUT_STATUSES))
+        return dict(zip(PAYOUT_STATUSES, counts.tolist()))
+
+    def latest(self, n, status=None, start=None, end=None, user=None):
+        """Rows of the n most recent payouts matching the filters, newest first"""
+        lo, hi = self._bounds(start, end)
+        code = None if status is None else PAYOUT_STATUSES.index(status)
+        if user is not None:
+            rows = []
+            row = self._latest_by_user[user] if user < len(self._latest_by_user) else -1
+            while row >= lo and len(rows) < n:
+                if row < hi and (code is None or self._statuses[row] == code):
+                    rows.append(row)
+                row = self._previous[row]
+            return np.array(rows, dtype=np.intp)
+        if code is None:
+            return np.arange(hi - 1, max(lo, hi - n) - 1, -1)
+        found = []
+        remaining = n
+        while hi > lo and remaining > 0:
+            block_start = max(lo, hi - SCAN_BLOCK)
+            matches = block_start + np.flatnonzero(self._statuses[block_start:hi] == code)[::-1][:remaining]
+            found.append(matches)
+            remaining -= len(matches)
+            hi = block_start
+        return np.concatenate(found) if found else np.arange(0)
+
+    def frame(self, rows):
+        """DataFrame(payout_id, date, user_row, amount, method, status) for rows"""
+        rows = np.asarray(rows, dtype=np.intp)
+        return pd.DataFrame({
+            "payout_id": [format_payout_id(number) for number in self._ids[rows].tolist()],
+            "date": self._times[rows].astype("datetime64[s]"),
+            "user_row": self._users[rows],
+            "amount": self._amounts[rows],
+            "method": np.array(PAYOUT_METHODS, dtype=object)[self._methods[rows]],
+            "status": np.array(PAYOUT_STATUSES, dtype=object)[self._statuses[rows]]
+        })
@@ -0,0 +1,229 @@
+"""Payout processing for the Payouts tab.
+
+Pending payouts are grouped by payout method and dispatched in batches to
+a ``PayoutProvider`` through a shared thread pool.  Each method has its own
+concurrency limit (banks and wallets throttle differently): batches wait in
+a per-method queue and only reach the pool when their method has a free
+slot, so a slow, tightly limited method never ties up workers that other
+methods could use.  Failed batches are retried with exponential backoff,
+and every payout carries an idempotency key so a retried batch never pays
+anyone twice.
+"""
+
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from user_store import PAYOUT_METHODS
+
+# Concurrent in-flight batches allowed per payout method
+DEFAULT_METHOD_CONCURRENCY = {
+    "ach": 4,
+    "paypal": 2,
+    "venmo": 2,
+    "cash_app": 2,
+    "intl_bank": 1,
+}
+
+
+@dataclass
+class Payout:
+    user_id: str
+    amount: int
+    method: str
+    payout_id: str = field(default_factory=lambda: f"PO-{uuid.uuid4().hex[:10].upper()}")
+
+    @property
+    def idempotency_key(self):
+        return f"{self.payout_id}:{self.user_id}:{self.amount}"
+
+
+class PayoutError(Exception):
+    """Raised by a provider when a batch could not be sent (retryable)"""
+
+
+class PayoutProvider:
+    """Interface for payout rails; send_batch returns {idempotency_key: status}"""
+
+    def send_batch(self, method, payouts):
+        raise NotImplementedError
+
+
+class LocalStubProvider(PayoutProvider):
+    """In-process stand-in for the real payout rails.
+
+    Simulates per-batch latency and random transient failures, and
+    remembers idempotency keys so repeated sends are acknowledged without
+    paying again.
+    """
+
+    def __init__(self, latency=0.05, failure_rate=0.05, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._sent = {}
+        self._lock = threading.Lock()
+
+    def send_batch(self, method, payouts):
+        time.sleep(self.latency)
+        with self._lock:
+            if self._rng.random() < self.failure_rate:
+                raise PayoutError(f"{method} provider unavailable")
+            results = {}
+            for payout in payouts:
+                key = payout.idempotency_key
+                if key in self._sent:
+                    results[key] = "duplicate"
+                else:
+                    self._sent[key] = payout
+                    results[key] = "completed"
+            return results
+
+    @property
+    def total_sent(self):
+        return len(self._sent)
+
+
+@dataclass
+class ProcessingProgress:
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    retries: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float = None
+    by_method: dict = field(default_factory=lambda: defaultdict(int))
+    # Payouts acknowledged by the provider, for posting to the wallet ledger
+    settled: list = field(default_factory=list)
+
+    @property
+    def done(self):
+        return self.finished_at is not None
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self):
+        """Payouts settled per second"""
+        return (self.completed + self.failed) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fraction(self):
+        return (self.completed + self.failed) / self.total if self.total else 1.0
+
+
+class PayoutProcessor:
+    """Batches payouts per method and runs them on a bounded worker pool"""
+
+    def __init__(self, provider, batch_size=50, max_workers=8, max_retries=3,
+                 backoff=0.1, method_concurrency=None):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="payout")
+        self._limits = {**DEFAULT_METHOD_CONCURRENCY, **(method_concurrency or {})}
+        # Batches waiting for a free slot, and batches in the pool, per method
+        self._queued = defaultdict(deque)
+        self._running = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def submit(self, payouts, on_done=None):
+        """Start processing in the background; returns a live ProcessingProgress.
+
+        on_done(progress) is called on a worker thread once every batch has
+        finished, before ``progress.done`` turns true, so results can be
+        recorded even if the caller stops polling.
+        """
+        payouts = list(payouts)
+        progress = ProcessingProgress(total=len(payouts))
+
+        by_method = defaultdict(list)
+        for payout in payouts:
+            if payout.method not in PAYOUT_METHODS:
+                raise ValueError(f"unknown payout method {payout.method!r}")
+            by_method[payout.method].append(payout)
+
+        batches = [
+            (method, group[i:i + self.batch_size])
+            for method, group in by_method.items()
+            for i in range(0, len(group), self.batch_size)
+        ]
+        def _finish():
+            try:
+                if on_done is not None:
+                    on_done(progress)
+            finally:
+                progress.finished_at = time.monotonic()
+
+        if not batches:
+            _finish()
+            return progress
+
+        remaining = [len(batches)]
+
+        def _on_done():
+            with self._lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                _finish()
+
+        with self._lock:
+            for method, batch in batches:
+                self._queued[method].append((batch, progress, _on_done))
+        for method in by_method:
+            self._dispatch(method)
+        return progress
+
+    def _dispatch(self, method):
+        """Hand queued batches of method to the pool while it has free slots"""
+        while True:
+            with self._lock:
+                if not self._queued[method] or self._running[method] >= self._limits.get(method, 1):
+                    return
+                batch, progress, on_done = self._queued[method].popleft()
+                self._running[method] += 1
+            future = self._executor.submit(self._run_batch, method, batch, progress)
+            future.add_done_callback(lambda _future, on_done=on_done: self._batch_done(method, on_done))
+
+    def _batch_done(self, method, on_done):
+        with self._lock:
+            self._running[method] -= 1
+        on_done()
+        self._dispatch(method)
+
+    def _run_batch(self, method, batch, progress):
+        for attempt in range(self.max_retries + 1):
+            try:
+                results = self.provider.send_batch(method, batch)
+                break
+            except PayoutError:
+                if attempt == self.max_retries:
+                    results = {}
+                    break
+                with self._lock:
+                    progress.retries += 1
+                time.sleep(self.backoff * 2 ** attempt)
+            except Exception:
+                # Not a retryable provider error; count the whole batch as failed
+                results = {}
+                break
+
+        settled = [payout for payout in batch if results.get(payout.idempotency_key) in ("completed", "duplicate")]
+        with self._lock:
+            progress.completed += len(settled)
+            progress.failed += len(batch) - len(settled)
+            progress.by_method[method] += len(settled)
+            progress.settled.extend(settled)
+
+    def shutdown(self):
+        with self._lock:
+            self._queued.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,150 @@
+"""Per-rerun timing and allocation spans for the dashboard's profiling mode.
+
+Sections of app.py are wrapped in ``profiler.span(name)``.  While profiling
+is disabled a span is a no-op; when enabled it records wall time and the
+net memory allocated (via tracemalloc) so the sidebar can show where a
+rerun spent its time.  tracemalloc is process-wide, so sessions share it:
+it runs while at least one session is profiling, and a session only
+resets the tracemalloc peak when no other session is tracing.  Spans can
+be exported in the Chrome trace event
+format for chrome://tracing or Perfetto.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import pandas as pd
+
+# Sessions with profiling enabled; tracemalloc runs while this is non-zero
+_tracing_lock = threading.Lock()
+_tracing_sessions = 0
+# Whether profiling started tracemalloc (so it should stop it), as opposed to e.g. -X tracemalloc
+_started_tracing = False
+
+
+def _start_tracing():
+    global _tracing_sessions, _started_tracing
+    with _tracing_lock:
+        if _tracing_sessions == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_sessions += 1
+
+
+def _stop_tracing():
+    global _tracing_sessions, _started_tracing
+    with _tracing_lock:
+        _tracing_sessions -= 1
+        if _tracing_sessions == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _reset_peak_if_alone():
+    """Reset the tracemalloc peak if no other session relies on it; returns whether it was reset"""
+    with _tracing_lock:
+        if _tracing_sessions == 1:
+            tracemalloc.reset_peak()
+            return True
+        return False
+
+
+@dataclass
+class Span:
+    name: str
+    depth: int
+    start: float
+    duration: float = 0.0
+    allocated: int = 0
+
+
+class Profiler:
+    """Collects nested spans for the current rerun"""
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.rerun_started = time.perf_counter()
+        self.peak_memory = 0
+        self._depth = 0
+        # Whether this rerun owns the tracemalloc peak, or samples traced memory at span boundaries
+        self._exact_peak = False
+
+    def __del__(self):
+        # A session that ends while profiling still holds a tracing reference
+        self.set_enabled(False)
+
+    def set_enabled(self, enabled):
+        if enabled and not self.enabled:
+            _start_tracing()
+        elif not enabled and self.enabled:
+            _stop_tracing()
+        self.enabled = enabled
+
+    def start_rerun(self):
+        self.spans = []
+        self.rerun_started = time.perf_counter()
+        self._depth = 0
+        if self.enabled:
+            self._exact_peak = _reset_peak_if_alone()
+            self.peak_memory = tracemalloc.get_traced_memory()[0]
+
+    def finish_rerun(self):
+        if self.enabled:
+            self._sample_memory()
+            if self._exact_peak:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+
+    def _sample_memory(self):
+        current = tracemalloc.get_traced_memory()[0]
+        self.peak_memory = max(self.peak_memory, current)
+        return current
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        span = Span(name=name, depth=self._depth, start=time.perf_counter())
+        self.spans.append(span)
+        allocated_before = self._sample_memory()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            span.duration = time.perf_counter() - span.start
+            span.allocated = self._sample_memory() - allocated_before
+
+    @property
+    def total(self):
+        return sum(span.duration for span in self.spans if span.depth == 0)
+
+    def breakdown(self):
+        """DataFrame of spans in call order, indented by nesting depth"""
+        return pd.DataFrame({
+            "Section": [" " * span.depth + span.name for span in self.spans],
+            "ms": [round(span.duration * 1000, 1) for span in self.spans],
+            "KB": [round(span.allocated / 1024, 1) for span in self.spans]
+        })
+
+    def chrome_trace(self):
+        """Spans as a Chrome trace-event JSON document"""
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": (span.start - self.rerun_started) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"allocated_bytes": span.allocated},
+            }
+            for span in self.spans
+        ]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
@@ -0,0 +1,145 @@
+"""Process-wide dataset snapshots shared by every dashboard session.
+
+The demo dataset (user store, indexes, rollups, ledger, payout log) is
+built once per server process and published as an immutable
+``DatasetSnapshot`` that every session reads without copying.  Changes,
+whether from a session or from a background worker, go through
+``SharedDataset.update``.  Under a lock it forks the components being
+changed, applies the change to the forks and publishes a new snapshot.
+Sessions still reading the previous snapshot are unaffected.
+
+Only the components named in an update are forked, and a fork shares
+what it can with the snapshot it came from: store columns, posting lists,
+colliding-row lists and the append-only ledger and payout log entries are
+copied only when the change overwrites them.  A fork may append past the
+end of arrays it shares.  That is safe because updates are serialized and
+always fork the current snapshot, and a snapshot is never written again
+once a newer one exists.
+
+Some forks still copy a structure with one entry per user, so an update
+is not free at scale.  The id and phone hash-index key tables, the
+trigram index's key list, the ledger's balances, the payout log's
+per-user and status arrays and the compliance masks are copied whole.
+At 1M users, adding a user forks all of them: about 110 ms under the
+update lock and about 115 MB more for that version.  A superseded
+snapshot is freed once no session's latest rerun still references it,
+so the extra memory is per version in use, not per write.
+
+``save_components`` and ``load_components`` keep a freshly built dataset
+on disk so a new server process can unpickle it instead of regenerating
+it.  Snapshot files are pickles: only load them from a directory the
+server itself writes to.
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+
+
+# Bump when a component class changes shape so older snapshot files are ignored
+SNAPSHOT_FORMAT = 3
+
+
+# Temporary files older than this were left by a writer that died mid-write
+STALE_WRITE_SECONDS = 600
+
+
+def save_components(components, path):
+    """Write components to path atomically, so readers never see a partial file"""
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(path) + "."
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        leftover = os.path.join(directory, name)
+        if name.startswith(prefix) and name.endswith(".tmp"):
+            try:
+                if time.time() - os.path.getmtime(leftover) > STALE_WRITE_SECONDS:
+                    os.remove(leftover)
+            except OSError:
+                pass
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=prefix, suffix=".tmp", delete=False) as f:
+        try:
+            pickle.dump((SNAPSHOT_FORMAT, dict(components)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def load_components(path, max_age=None):
+    """Components written by save_components(), or None if missing, outdated or older than max_age seconds"""
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, "rb") as f:
+            version, components = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError, TypeError):
+        return None
+    return components if version == SNAPSHOT_FORMAT else None
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    components: MappingProxyType
+    version: int
+    # Last user database sequence folded into this snapshot
+    db_seq: int
+    dataset_id: str
+
+    def __getitem__(self, name):
+        return self.components[name]
+
+    @property
+    def token(self):
+        """Identifies this exact data; use in derived-result cache keys"""
+        return (self.dataset_id, self.version)
+
+
+class SharedDataset:
+    """The current snapshot of one dataset, replaced by a new one on every change.
+
+    ``fork(components, names)`` returns a components dict in which the
+    named components are copy-on-write forks and the rest are shared.
+    """
+
+    def __init__(self, components, fork):
+        self.id = uuid.uuid4().hex
+        self._fork = fork
+        self._current = DatasetSnapshot(MappingProxyType(dict(components)), version=0, db_seq=0, dataset_id=self.id)
+        self._lock = threading.Lock()
+
+    @property
+    def current(self):
+        return self._current
+
+    def update(self, names, apply):
+        """Publish the result of apply(components) on forks of the named components; returns apply's result"""
+        with self._lock:
+            snapshot = self._current
+            components = self._fork(snapshot.components, names)
+            result = apply(components)
+            self._publish(components, snapshot.db_seq)
+            return result
+
+    def advance(self, names, users_since, apply):
+        """Fold rows from users_since(db_seq) into a new snapshot via apply(components, users)"""
+        with self._lock:
+            snapshot = self._current
+            persisted = list(users_since(snapshot.db_seq))
+            if not persisted:
+                return snapshot
+            components = self._fork(snapshot.components, names)
+            apply(components, [user for _, user in persisted])
+            return self._publish(components, persisted[-1][0])
+
+    def _publish(self, components, db_seq):
+        self._current = DatasetSnapshot(
+            MappingProxyType(components), version=self._current.version + 1, db_seq=db_seq, dataset_id=self.id
+        )
+        return self._current
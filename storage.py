@@ -0,0 +1,160 @@
+"""Persistent SQLite user storage shared by every dashboard session.
+
+One ``UserDatabase`` is created per server process (see
+``get_user_database`` in app.py) and hands out connections from a small
+pool, so Streamlit sessions never open their own.  Users are stored
+flattened with the same column names as ``UserStore``.  The database is an
+append log feeding the in-memory store: the integer rowid doubles as an
+append cursor so the shared dataset pulls only the rows it has not seen,
+and filtering, search and duplicate checks run against the store and its
+indexes rather than SQL.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from user_store import ALL_COLUMNS, BOOL_COLUMNS, INT_COLUMNS, flatten_record, nest_record
+
+DEFAULT_BATCH_SIZE = 1_000
+
+
+def _sql_type(name):
+    if name in INT_COLUMNS or name in BOOL_COLUMNS:
+        return "INTEGER"
+    return "TEXT"
+
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS users (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+    + ", ".join(
+        f"{name} {_sql_type(name)}" + (" NOT NULL UNIQUE" if name == "id" else "")
+        for name in ALL_COLUMNS
+    )
+    + ")",
+]
+
+_INSERT = (
+    f"INSERT INTO users ({', '.join(ALL_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in ALL_COLUMNS)})"
+)
+_SELECT = f"SELECT seq, {', '.join(ALL_COLUMNS)} FROM users"
+_ID = ALL_COLUMNS.index("id")
+
+
+def _to_row(user):
+    flat = flatten_record(user)
+    if flat["metadata"] is not None:
+        flat["metadata"] = json.dumps(flat["metadata"])
+    return tuple(flat[name] for name in ALL_COLUMNS)
+
+
+def _from_row(row):
+    flat = dict(zip(ALL_COLUMNS, row[1:]))
+    if flat["metadata"]:
+        flat["metadata"] = json.loads(flat["metadata"])
+    return nest_record(flat)
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections usable from any thread"""
+
+    def __init__(self, path, size=4, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = self._pool.get(timeout=self.timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class UserDatabase:
+    """Users persisted in SQLite behind a shared connection pool"""
+
+    def __init__(self, path, pool_size=4, batch_size=DEFAULT_BATCH_SIZE):
+        self.pool = ConnectionPool(path, size=pool_size)
+        self.batch_size = batch_size
+        self._write_lock = threading.Lock()
+        with self.pool.connection() as conn, conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def insert_users(self, users):
+        """Insert users in batched transactions; returns the number inserted"""
+        return sum(len(rows) for rows, _ in self._write_batches(users))
+
+    def insert_new_users(self, users):
+        """Insert users whose id is not stored yet; returns the ids skipped as already stored"""
+        return [user_id for _, skipped in self._write_batches(users, skip_existing=True) for user_id in skipped]
+
+    def _write_batches(self, users, skip_existing=False):
+        """Write users in batches, yielding (rows inserted, ids skipped) per batch"""
+        batch = []
+        for user in users:
+            batch.append(_to_row(user))
+            if len(batch) >= self.batch_size:
+                yield self._write_batch(batch, skip_existing)
+                batch = []
+        if batch:
+            yield self._write_batch(batch, skip_existing)
+
+    def _write_batch(self, rows, skip_existing=False):
+        # SQLite allows one writer at a time; serialize here rather than
+        # letting sessions spin on SQLITE_BUSY
+        skipped = []
+        with self._write_lock, self.pool.connection() as conn, conn:
+            if skip_existing:
+                # Checked under the write lock, so no other writer can add these ids in between
+                ids = [row[_ID] for row in rows]
+                placeholders = ", ".join("?" for _ in ids)
+                existing = {row[0] for row in conn.execute(f"SELECT id FROM users WHERE id IN ({placeholders})", ids)}
+                skipped = [user_id for user_id in ids if user_id in existing]
+                rows = [row for row in rows if row[_ID] not in existing]
+            conn.executemany(_INSERT, rows)
+        return rows, skipped
+
+    def update_user(self, user_id, values):
+        """Overwrite flat column values for one user by id"""
+        unknown = set(values) - set(ALL_COLUMNS)
+        if unknown:
+            raise KeyError(f"unknown columns: {sorted(unknown)}")
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        with self._write_lock, self.pool.connection() as conn, conn:
+            conn.execute(f"UPDATE users SET {assignments} WHERE id = ?", [*values.values(), user_id])
+
+    def get_user(self, user_id):
+        with self.pool.connection() as conn:
+            row = conn.execute(f"{_SELECT} WHERE id = ?", (user_id,)).fetchone()
+        return _from_row(row) if row else None
+
+    def users_since(self, seq=0):
+        """Yield (seq, user) for every row written after seq, in insert order"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"{_SELECT} WHERE seq > ? ORDER BY seq", (seq,)).fetchall()
+        for row in rows:
+            yield row[0], _from_row(row)
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,45 @@
+"""End-to-end checks of dashboard interactions through Streamlit's AppTest harness"""
+
+import os
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # A private database and snapshot directory per test
+    monkeypatch.setenv("DRAGON_PAYOUT_DB", str(tmp_path / "users.db"))
+    monkeypatch.setenv("DATASET_SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    return AppTest.from_file(APP_PATH, default_timeout=120).run()
+
+
+def open_section(at, name):
+    at.radio(key="section").set_value(name).run()
+    assert not at.exception, at.exception
+    return at
+
+
+@pytest.mark.parametrize("action", ["🪪 Mark KYC complete", "🌐 Clear OFAC screening", "🚩 Remove flag"])
+def test_compliance_review_actions(app, action):
+    at = open_section(app, "🛡️ Compliance")
+    next(button for button in at.button if button.label == action).click().run()
+    assert not at.exception, at.exception
+
+
+def test_process_pending_payouts_reports_once_settled(app):
+    at = open_section(app, "💰 Payouts")
+    next(button for button in at.button if "Process Pending Payouts" in button.label).click().run()
+    assert not at.exception, at.exception
+    progress = at.session_state["payout_run"]
+    deadline = time.monotonic() + 30
+    while not progress.done:
+        assert time.monotonic() < deadline, "payout run did not finish"
+        time.sleep(0.05)
+    at.run()
+    assert not at.exception, at.exception
+    assert any("processed" in message.value for message in [*at.success, *at.warning])
+    assert progress.completed + progress.failed == progress.total > 0
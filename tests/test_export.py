@@ -0,0 +1,39 @@
+"""Export files must be something st.download_button can serve from a data callable"""
+
+import io
+
+import numpy as np
+import pytest
+
+import demo_data
+from export import export_file, iter_csv
+
+
+def test_export_file_is_accepted_by_download_button():
+    download_data_util = pytest.importorskip("streamlit.runtime.download_data_util")
+    store = demo_data.generate_users(120, seed=1)
+    rows = np.arange(0, 120, 3)
+    expected = b"".join(iter_csv(store, rows))
+
+    exported = export_file(iter_csv(store, rows, chunk_size=16), ".csv")
+    data, _ = download_data_util.convert_data_to_bytes_and_infer_mime(
+        exported, unsupported_error=TypeError("unsupported export file type")
+    )
+    assert data == expected
+    exported.close()
+
+
+def test_export_file_propagates_stream_errors():
+    def failing_stream():
+        yield b"id,email\n"
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        export_file(failing_stream())
+
+
+def test_export_file_reads_from_start():
+    exported = export_file(iter([b"a,b\n", b"1,2\n"]))
+    assert isinstance(exported, io.BufferedReader)
+    assert exported.read() == b"a,b\n1,2\n"
+    exported.close()
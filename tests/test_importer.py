@@ -0,0 +1,65 @@
+"""Bad import input must come back as per-row errors, never as an exception"""
+
+import io
+
+import pytest
+
+from importer import import_users
+from storage import UserDatabase
+
+HEADER = "id,first_name,last_name,email,phone_number.country_code,phone_number.phone_number,wallet.amount\n"
+
+
+def good_csv_row(user_id, wallet="100"):
+    return f"{user_id},Ada,Lovelace,{user_id}@example.com,1,4155550100,{wallet}\n"
+
+
+def good_json_row(user_id):
+    return (
+        f'{{"id": "{user_id}", "first_name": "Ada", "last_name": "Lovelace", "email": "{user_id}@example.com", '
+        f'"phone_number": {{"country_code": "1", "phone_number": "4155550100"}}}}\n'
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = UserDatabase(str(tmp_path / "users.db"))
+    yield db
+    db.close()
+
+
+def run_import(db, text, fmt):
+    return import_users(io.BytesIO(text.encode()), fmt, insert=db.insert_new_users, chunk_size=2, workers=1)
+
+
+def errors_by_row(report):
+    return {error.row: error.field for error in report.errors}
+
+
+def test_malformed_jsonl_lines_are_row_errors(db):
+    text = good_json_row("a") + "{not json\n" + "[1, 2]\n" + good_json_row("b")
+    report = run_import(db, text, "jsonl")
+    assert (report.total, report.imported, report.invalid) == (4, 2, 2)
+    assert errors_by_row(report) == {2: "line", 3: "line"}
+
+
+def test_csv_line_with_too_many_fields_is_a_row_error(db):
+    text = HEADER + good_csv_row("a") + good_csv_row("b").rstrip("\n") + ",extra\n" + good_csv_row("c")
+    report = run_import(db, text, "csv")
+    assert (report.total, report.imported, report.invalid) == (3, 2, 1)
+    assert errors_by_row(report) == {2: "line"}
+
+
+def test_wallet_beyond_int64_is_a_row_error(db):
+    text = HEADER + good_csv_row("a", wallet="9" * 25) + good_csv_row("b", wallet="9" * 18)
+    report = run_import(db, text, "csv")
+    assert (report.imported, report.invalid) == (1, 1)
+    assert errors_by_row(report) == {1: "wallet.amount"}
+
+
+def test_ids_already_stored_are_row_errors(db):
+    first = run_import(db, HEADER + good_csv_row("a"), "csv")
+    assert first.imported == 1
+    report = run_import(db, HEADER + good_csv_row("b") + good_csv_row("a") + good_csv_row("c"), "csv")
+    assert (report.imported, report.invalid) == (2, 1)
+    assert errors_by_row(report) == {2: "id"}
@@ -0,0 +1,33 @@
+"""Payout batches must end up counted as completed or failed, whatever the provider does"""
+
+import time
+
+from payouts import LocalStubProvider, Payout, PayoutProcessor, PayoutProvider
+
+
+class BrokenProvider(PayoutProvider):
+    def send_batch(self, method, payouts):
+        raise RuntimeError("provider bug")
+
+
+def wait(progress, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not progress.done:
+        assert time.monotonic() < deadline, "payout run did not finish"
+        time.sleep(0.01)
+    return progress
+
+
+def test_unexpected_provider_errors_count_as_failures():
+    processor = PayoutProcessor(BrokenProvider(), batch_size=3)
+    progress = wait(processor.submit([Payout("user", 100, "ach") for _ in range(7)]))
+    assert (progress.completed, progress.failed) == (0, 7)
+    processor.shutdown()
+
+
+def test_every_payout_is_settled_or_failed():
+    processor = PayoutProcessor(LocalStubProvider(latency=0, failure_rate=0), batch_size=3)
+    payouts = [Payout("user", 100, method) for method in ("ach", "intl_bank", "venmo") for _ in range(5)]
+    progress = wait(processor.submit(payouts))
+    assert (progress.completed, progress.failed) == (15, 0)
+    processor.shutdown()
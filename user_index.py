@@ -0,0 +1,397 @@
+"""Secondary indexes over the columnar UserStore.
+
+Indexes are keyed by store row number and are append-only, mirroring the
+store itself: rows are only ever added, so posting lists stay sorted and
+can be intersected without re-sorting.
+"""
+
+import bisect
+import copy
+import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import islice
+
+import numpy as np
+
+from user_store import BOOL_COLUMNS, CATEGORICAL_COLUMNS
+
+SEARCH_FIELDS = ("first_name", "last_name", "email")
+NGRAM = 3
+
+FILTER_FIELDS = (
+    "status", "default_payout_method", "tax_id_verification", "ofac_status",
+) + BOOL_COLUMNS
+
+
+def _postings(values):
+    return np.frombuffer(values, dtype=np.uint32) if len(values) else np.empty(0, dtype=np.uint32)
+
+
+def _writable_postings(postings, owned, key):
+    """Posting list for key that may be modified in place, copied first if a fork still shares it"""
+    values = postings.get(key)
+    if values is None or (owned is not None and key not in owned):
+        values = postings[key] = array("I", values if values is not None else ())
+        if owned is not None:
+            owned.add(key)
+    return values
+
+
+class TrigramIndex:
+    """Substring search over lowercased name and email fields.
+
+    Every field is broken into overlapping trigrams with a posting list of
+    row numbers per trigram.  A query intersects the posting lists of its
+    own trigrams (smallest first) and only verifies the surviving
+    candidates, so lookups cost O(matches) rather than O(users).  Queries
+    shorter than a trigram match too much of the table for postings to
+    help and fall back to a scan of the lowercased keys.
+    """
+
+    def __init__(self, fields=SEARCH_FIELDS):
+        self.fields = tuple(fields)
+        self._grams = {}
+        self._keys = []
+        # Posting lists this index may append to in place; None means all (not a fork)
+        self._owned = None
+
+    @classmethod
+    def build(cls, store, fields=SEARCH_FIELDS):
+        index = cls(fields)
+        columns = [store.column(name) for name in index.fields]
+        for row, values in enumerate(zip(*columns)):
+            index.add(row, values)
+        return index
+
+    def __len__(self):
+        return len(self._keys)
+
+    def fork(self):
+        """Copy-on-write copy: posting lists are shared until this index appends to them.
+
+        The gram table and the per-row key list are copied (O(rows)).
+        """
+        index = copy.copy(self)
+        index._grams = dict(self._grams)
+        index._keys = list(self._keys)
+        index._owned = set()
+        return index
+
+    def add(self, row, values):
+        """Index one row; rows must be added in store order"""
+        if row != len(self._keys):
+            raise ValueError(f"expected row {len(self._keys)}, got {row}")
+        values = [(value or "").lower() for value in values]
+        self._keys.append("\x00".join(values))
+
+        seen = set()
+        for value in values:
+            for start in range(len(value) - NGRAM + 1):
+                seen.add(value[start:start + NGRAM])
+        for gram in seen:
+            _writable_postings(self._grams, self._owned, gram).append(row)
+
+    def add_user(self, row, user):
+        self.add(row, [user.get(name) for name in self.fields])
+
+    def search(self, query, rows=None, limit=None):
+        """Return sorted row numbers whose fields contain query (case-insensitive).
+
+        If rows is given (a sorted array of row numbers), results are
+        restricted to it.  If limit is given, stop after that many matches.
+        """
+        query = query.lower()
+        if not query:
+            rows = np.arange(len(self._keys), dtype=np.intp) if rows is None else np.asarray(rows, dtype=np.intp)
+            return rows[:limit]
+
+        if len(query) < NGRAM:
+            candidates = range(len(self._keys)) if rows is None else rows
+            return self._verify(query, candidates, limit)
+
+        grams = {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+        posting_lists = []
+        for gram in grams:
+            postings = self._grams.get(gram)
+            if postings is None:
+                return np.empty(0, dtype=np.intp)
+            posting_lists.append(postings)
+        posting_lists.sort(key=len)
+
+        candidates = _postings(posting_lists[0])
+        if rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        for postings in posting_lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, _postings(postings), assume_unique=True)
+
+        # Trigram hits can be non-contiguous; confirm the real substring match
+        return self._verify(query, candidates.tolist(), limit)
+
+    def _verify(self, query, candidates, limit=None):
+        keys = self._keys
+        matches = (row for row in candidates if query in keys[row])
+        if limit is not None:
+            matches = islice(matches, limit)
+        return np.fromiter(matches, dtype=np.intp)
+
+
+class FilterIndex:
+    """Posting lists per value of the categorical and compliance columns.
+
+    A combined filter starts from the smallest matching posting list and
+    narrows it with direct column lookups for the remaining criteria, so
+    the cost is bounded by the most selective filter instead of the
+    table size.
+    """
+
+    def __init__(self, store, fields=FILTER_FIELDS):
+        self.store = store
+        self.fields = tuple(fields)
+        self._postings = {}
+        self._size = 0
+        # Posting lists this index may modify in place; None means all (not a fork)
+        self._owned = None
+
+    @classmethod
+    def build(cls, store, fields=FILTER_FIELDS):
+        index = cls(store, fields)
+        for name in index.fields:
+            values = store.column(name)
+            for value in np.unique(values):
+                rows = np.flatnonzero(values == value).astype(np.uint32)
+                index._postings[(name, value.item())] = array("I", rows.tobytes())
+        index._size = len(store)
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def fork(self):
+        """Copy-on-write copy: posting lists are shared until this index modifies them.
+
+        The fork still points at the same store; rebind ``store`` when
+        forking the store too.
+        """
+        index = copy.copy(self)
+        index._postings = dict(self._postings)
+        index._owned = set()
+        return index
+
+    def add(self, row):
+        """Index a row that has just been appended to the store"""
+        if row != self._size:
+            raise ValueError(f"expected row {self._size}, got {row}")
+        for name in self.fields:
+            key = (name, self.store.column(name)[row].item())
+            _writable_postings(self._postings, self._owned, key).append(row)
+        self._size += 1
+
+    def update(self, row, column, old, new):
+        """Move a row between posting lists after a column value changed (raw values)"""
+        if column not in self.fields or old == new:
+            return
+        _writable_postings(self._postings, self._owned, (column, old)).remove(row)
+        bisect.insort(_writable_postings(self._postings, self._owned, (column, new)), row)
+
+    def _key(self, column, value):
+        if column in CATEGORICAL_COLUMNS:
+            return (column, self.store.encode(column, value))
+        if column in BOOL_COLUMNS:
+            return (column, bool(value))
+        raise KeyError(f"{column!r} is not a filterable column")
+
+    def count(self, column, value):
+        return len(self._postings.get(self._key(column, value), ()))
+
+    def select(self, **criteria):
+        """Return sorted row numbers matching every column=value criterion"""
+        if not criteria:
+            return np.arange(self._size, dtype=np.intp)
+
+        keys = [self._key(column, value) for column, value in criteria.items()]
+        keys.sort(key=lambda key: len(self._postings.get(key, ())))
+        rows = _postings(self._postings.get(keys[0], array("I"))).astype(np.intp)
+        for column, value in keys[1:]:
+            if not len(rows):
+                break
+            rows = rows[self.store.column(column)[rows] == value]
+        return rows
+
+
+def exact_key(values):
+    return values[0] if len(values) == 1 else tuple(values)
+
+
+def casefold_key(values):
+    """Case- and whitespace-insensitive key (e.g. for emails)"""
+    return exact_key(tuple((value or "").strip().lower() for value in values))
+
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def phone_key(values):
+    """Digits-only key, so "+1" matches "1" and "415-555-1234" matches "4155551234" """
+    return tuple(_NON_DIGITS.sub("", value or "") for value in values)
+
+
+class HashIndex:
+    """Exact-match lookup from a normalized key to store row numbers.
+
+    Unique keys map straight to a row number; only colliding keys pay for a
+    list, so the common case costs one dict entry per row.
+    """
+
+    def __init__(self, fields, normalize=None):
+        self.fields = tuple(fields)
+        self.normalize = normalize or exact_key
+        self._rows = {}
+        # Keys whose row list this index may append to in place; None means all (not a fork)
+        self._owned = None
+
+    @classmethod
+    def build(cls, store, fields, normalize=None):
+        index = cls(fields, normalize)
+        columns = [store.column(name) for name in index.fields]
+        for row, values in enumerate(zip(*columns)):
+            index.add(row, values)
+        return index
+
+    def __len__(self):
+        return len(self._rows)
+
+    def key(self, values):
+        return self.normalize(tuple(values))
+
+    def fork(self):
+        """Copy-on-write copy: colliding-row lists are shared until this index appends to them.
+
+        The key table itself is copied, one entry per distinct key.
+        """
+        index = copy.copy(self)
+        index._rows = dict(self._rows)
+        index._owned = set()
+        return index
+
+    def add(self, row, values):
+        key = self.key(values)
+        existing = self._rows.get(key)
+        if existing is None:
+            self._rows[key] = row
+        elif isinstance(existing, list) and (self._owned is None or key in self._owned):
+            existing.append(row)
+        else:
+            # A new list, or a copy of one still shared with the index this was forked from
+            self._rows[key] = [*(existing if isinstance(existing, list) else (existing,)), row]
+            if self._owned is not None:
+                self._owned.add(key)
+
+    def get(self, *values):
+        """All rows whose key matches values (empty tuple if none)"""
+        rows = self._rows.get(self.key(values))
+        if rows is None:
+            return ()
+        return tuple(rows) if isinstance(rows, list) else (rows,)
+
+    def first(self, *values):
+        rows = self.get(*values)
+        return rows[0] if rows else None
+
+    def duplicates(self):
+        """(key, rows) for every non-blank key shared by several rows, largest clusters first"""
+        clusters = [
+            (key, tuple(rows)) for key, rows in self._rows.items()
+            if isinstance(rows, list) and all(key if isinstance(key, tuple) else (key,))
+        ]
+        clusters.sort(key=lambda cluster: len(cluster[1]), reverse=True)
+        return clusters
+
+
+def estimate_size(value):
+    """Approximate bytes held by a cached derived result"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if hasattr(value, "memory_usage"):
+        # pandas DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if hasattr(value, "to_plotly_json"):
+        # Plotly figure: roughly the size of its serialized traces and layout
+        return len(value.to_json())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache for derived results.
+
+    Bounded by entry count and, optionally, by the estimated bytes of its
+    values; the least recently used entries are evicted first.  Hit, miss
+    and eviction counts are kept for the sidebar.
+    """
+
+    def __init__(self, maxsize=128, max_bytes=None, sizeof=estimate_size):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._data[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self.nbytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.nbytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.put(key, value)
+        return value
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+
+_MISSING = object()
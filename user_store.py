@@ -0,0 +1,356 @@
+"""Columnar user store backing the Dragon Payout dashboard.
+
+Users are kept as one NumPy array per field instead of a list of nested
+dicts: categorical fields are stored as small integer codes, wallet
+balances as int64 and compliance flags as booleans.  Aggregates such as
+verified counts and wallet totals become vectorized reductions, and
+``record()`` rebuilds the familiar nested dict for a single row when the
+UI needs it.
+"""
+
+import copy
+from datetime import datetime
+
+import numpy as np
+
+STATUSES = ("verified", "unverified", "in_review", "disabled")
+PAYOUT_METHODS = ("ach", "paypal", "venmo", "cash_app", "intl_bank")
+TAX_ID_VERIFICATIONS = ("verified", "unsubmitted", "pending")
+OFAC_STATUSES = ("unflagged", "flagged", "pending")
+COUNTRY_CODES = ("1", "44", "33", "49", "81")
+
+# Field name -> category vocabulary, stored as int8 codes (-1 means missing)
+CATEGORICAL_COLUMNS = {
+    "status": STATUSES,
+    "default_payout_method": PAYOUT_METHODS,
+    "payout_platform": PAYOUT_METHODS,
+    "tax_id_verification": TAX_ID_VERIFICATIONS,
+    "ofac_status": OFAC_STATUSES,
+}
+
+STRING_COLUMNS = (
+    "id", "first_name", "last_name", "email",
+    "country_code", "phone_number",
+    "payout_details_id", "payout_description", "payout_mask",
+    "payout_country", "payout_currency", "internal_id",
+)
+
+INT_COLUMNS = ("wallet_amount", "wallet_withdrawable_amount", "wallet_credit_balance")
+
+BOOL_COLUMNS = (
+    "tax_id_collected", "address_collected", "date_of_birth_collected",
+    "id_verified", "flagged", "ofac",
+)
+
+OBJECT_COLUMNS = ("metadata",)
+
+DATETIME_COLUMNS = ("created_date",)
+
+
+def _empty_column(name, capacity):
+    if name in CATEGORICAL_COLUMNS:
+        return np.full(capacity, -1, dtype=np.int8)
+    if name in INT_COLUMNS:
+        return np.zeros(capacity, dtype=np.int64)
+    if name in BOOL_COLUMNS:
+        return np.zeros(capacity, dtype=bool)
+    if name in DATETIME_COLUMNS:
+        return np.full(capacity, np.datetime64("NaT"), dtype="datetime64[s]")
+    return np.empty(capacity, dtype=object)
+
+
+ALL_COLUMNS = (
+    STRING_COLUMNS + tuple(CATEGORICAL_COLUMNS) + INT_COLUMNS
+    + BOOL_COLUMNS + DATETIME_COLUMNS + OBJECT_COLUMNS
+)
+
+
+def flatten_record(user):
+    """Flatten a nested user dict into a {column: value} row"""
+    phone = user.get("phone_number") or {}
+    details = user.get("default_payout_method_details") or {}
+    wallet = user.get("wallet") or {}
+    compliance = user.get("compliance") or {}
+    flags = compliance.get("flags") or {}
+    metadata = dict(user.get("metadata") or {})
+    internal_id = metadata.pop("internal_id", None)
+
+    return {
+        "id": user["id"],
+        "first_name": user["first_name"],
+        "last_name": user["last_name"],
+        "email": user["email"],
+        "country_code": phone.get("country_code"),
+        "phone_number": phone.get("phone_number"),
+        "status": user.get("status"),
+        "default_payout_method": user.get("default_payout_method"),
+        "payout_details_id": details.get("id"),
+        "payout_platform": details.get("platform"),
+        "payout_description": details.get("description"),
+        "payout_mask": details.get("mask"),
+        "payout_country": details.get("country"),
+        "payout_currency": details.get("currency"),
+        "wallet_amount": wallet.get("amount", 0),
+        "wallet_withdrawable_amount": wallet.get("withdrawable_amount", 0),
+        "wallet_credit_balance": wallet.get("credit_balance", 0),
+        "tax_id_collected": compliance.get("tax_id_collected", False),
+        "tax_id_verification": compliance.get("tax_id_verification", "unsubmitted"),
+        "address_collected": compliance.get("address_collected", False),
+        "date_of_birth_collected": compliance.get("date_of_birth_collected", False),
+        "id_verified": compliance.get("id_verified", False),
+        "flagged": compliance.get("flagged", False),
+        "ofac": flags.get("ofac", False),
+        "ofac_status": flags.get("ofac_status", "unflagged"),
+        "created_date": user.get("created_date"),
+        "internal_id": internal_id,
+        "metadata": metadata or None,
+    }
+
+
+def nest_record(flat):
+    """Inverse of flatten_record: rebuild the nested user dict"""
+    v = flat.get
+
+    user = {
+        "id": v("id"),
+        "first_name": v("first_name"),
+        "last_name": v("last_name"),
+        "email": v("email"),
+        "phone_number": {
+            "country_code": v("country_code"),
+            "phone_number": v("phone_number"),
+        },
+        "default_payout_method": v("default_payout_method"),
+    }
+    if v("payout_details_id") is not None:
+        user["default_payout_method_details"] = {
+            "id": v("payout_details_id"),
+            "platform": v("payout_platform"),
+            "description": v("payout_description"),
+            "mask": v("payout_mask"),
+            "country": v("payout_country"),
+            "currency": v("payout_currency"),
+        }
+    user["wallet"] = {
+        "amount": v("wallet_amount", 0),
+        "withdrawable_amount": v("wallet_withdrawable_amount", 0),
+        "credit_balance": v("wallet_credit_balance", 0),
+    }
+    user["status"] = v("status")
+    user["compliance"] = {
+        "tax_id_collected": bool(v("tax_id_collected")),
+        "tax_id_verification": v("tax_id_verification"),
+        "address_collected": bool(v("address_collected")),
+        "date_of_birth_collected": bool(v("date_of_birth_collected")),
+        "id_verified": bool(v("id_verified")),
+        "flagged": bool(v("flagged")),
+        "flags": {
+            "ofac": bool(v("ofac")),
+            "ofac_status": v("ofac_status"),
+        },
+    }
+    user["created_date"] = v("created_date")
+    metadata = dict(v("metadata") or {})
+    if v("internal_id") is not None:
+        metadata = {"internal_id": v("internal_id"), **metadata}
+    if metadata:
+        user["metadata"] = metadata
+    return user
+
+
+class UserStore:
+    """Growable column-per-field user table"""
+
+    def __init__(self, capacity=0):
+        self._size = 0
+        self._columns = {name: _empty_column(name, capacity) for name in ALL_COLUMNS}
+        # Columns this store may overwrite in place; None means all (not a fork)
+        self._owned = None
+
+    @classmethod
+    def from_records(cls, users):
+        """Build a store from an iterable of nested user dicts"""
+        users = list(users)
+        store = cls(capacity=len(users))
+        for user in users:
+            store.append(user)
+        return store
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._columns["id"])
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, self.capacity * 2, 16)
+        for name, old in self._columns.items():
+            grown = _empty_column(name, new_capacity)
+            grown[:self._size] = old[:self._size]
+            self._columns[name] = grown
+        self._owned = None
+
+    def fork(self):
+        """Copy-on-write copy: columns are shared until this store overwrites them.
+
+        Appends write past the end of shared columns, which the store forked
+        from never reads; only fork a store that is no longer written to.
+        """
+        store = copy.copy(self)
+        store._columns = dict(self._columns)
+        store._owned = set()
+        return store
+
+    def _writable(self, name):
+        if self._owned is not None and name not in self._owned:
+            self._columns[name] = self._columns[name].copy()
+            self._owned.add(name)
+        return self._columns[name]
+
+    @staticmethod
+    def encode(column, value):
+        """Return the int8 code for a categorical value (-1 if missing/unknown)"""
+        try:
+            return CATEGORICAL_COLUMNS[column].index(value)
+        except ValueError:
+            return -1
+
+    def append(self, user):
+        """Append one nested user dict and return its row index"""
+        self._reserve(1)
+        row = self._size
+        for name, value in flatten_record(user).items():
+            if name in CATEGORICAL_COLUMNS:
+                value = self.encode(name, value)
+            elif name in DATETIME_COLUMNS:
+                value = np.datetime64(value, "s") if value else np.datetime64("NaT")
+            self._columns[name][row] = value
+        self._size += 1
+        return row
+
+    def extend(self, users):
+        """Append several user dicts, returning the range of new row indices"""
+        users = list(users)
+        start = self._size
+        self._reserve(len(users))
+        for user in users:
+            self.append(user)
+        return range(start, self._size)
+
+    def extend_columns(self, columns):
+        """Bulk-append rows given as {column: array}; categoricals as int8 codes.
+
+        Columns that are not supplied keep their empty defaults.  Returns the
+        range of new row indices.
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("all columns must have the same length")
+        count = lengths.pop()
+        unknown = set(columns) - set(self._columns)
+        if unknown:
+            raise KeyError(f"unknown columns: {sorted(unknown)}")
+
+        self._reserve(count)
+        start = self._size
+        for name, values in columns.items():
+            self._columns[name][start:start + count] = values
+        self._size += count
+        return range(start, self._size)
+
+    def update(self, row, values):
+        """Overwrite flat column values for one row; returns the previous raw values.
+
+        Categorical values are given as strings and returned as int8 codes,
+        matching what indexes keyed on raw column values expect.
+        """
+        if not 0 <= row < self._size:
+            raise IndexError(f"user row {row} out of range")
+        previous = {}
+        for name, value in values.items():
+            column = self._writable(name)
+            previous[name] = column[row].item() if hasattr(column[row], "item") else column[row]
+            if name in CATEGORICAL_COLUMNS:
+                value = self.encode(name, value)
+            elif name in DATETIME_COLUMNS:
+                value = np.datetime64(value, "s") if value else np.datetime64("NaT")
+            column[row] = value
+        return previous
+
+    def column(self, name):
+        """Return a read-only view over the live rows of a column"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def decoded(self, column, rows=None):
+        """Return categorical values as strings (object array)"""
+        codes = self.column(column) if rows is None else self.column(column)[rows]
+        vocab = np.array(CATEGORICAL_COLUMNS[column] + (None,), dtype=object)
+        return vocab[codes]
+
+    def mask(self, column, value):
+        """Boolean mask of rows where a column equals value"""
+        if column in CATEGORICAL_COLUMNS:
+            return self.column(column) == self.encode(column, value)
+        return self.column(column) == value
+
+    def count(self, column, value):
+        return int(np.count_nonzero(self.mask(column, value)))
+
+    def total(self, column):
+        return int(self.column(column).sum())
+
+    def value_counts(self, column):
+        """Counts per category for a categorical column, in vocabulary order"""
+        vocab = CATEGORICAL_COLUMNS[column]
+        codes = self.column(column)
+        counts = np.bincount(codes[codes >= 0], minlength=len(vocab))
+        return dict(zip(vocab, counts.tolist()))
+
+    def order(self, rows, column, descending=False):
+        """Return rows reordered by a column (stable, ties keep row order)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        values = self.column(column)[rows]
+        if column in CATEGORICAL_COLUMNS:
+            # Sort categoricals alphabetically rather than by code
+            rank = np.argsort(np.argsort(np.array(CATEGORICAL_COLUMNS[column], dtype=object)))
+            values = np.append(rank, -1)[values]
+        order = np.argsort(values, kind="stable")
+        if descending:
+            order = order[::-1]
+        return rows[order]
+
+    def _value(self, name, row):
+        value = self._columns[name][row]
+        if name in CATEGORICAL_COLUMNS:
+            return CATEGORICAL_COLUMNS[name][value] if value >= 0 else None
+        if name in INT_COLUMNS:
+            return int(value)
+        if name in BOOL_COLUMNS:
+            return bool(value)
+        if name in DATETIME_COLUMNS:
+            return None if np.isnat(value) else value.astype(datetime).isoformat()
+        return value
+
+    def flat_record(self, row):
+        """Return one row as a flat {column: python value} dict"""
+        if not -self._size <= row < self._size:
+            raise IndexError(f"user row {row} out of range")
+        row = row % self._size
+        return {name: self._value(name, row) for name in ALL_COLUMNS}
+
+    def record(self, row):
+        """Rebuild the nested user dict for a single row"""
+        return nest_record(self.flat_record(row))
+
+    def __getitem__(self, row):
+        return self.record(row)
+
+    def __iter__(self):
+        for row in range(self._size):
+            yield self.record(row)